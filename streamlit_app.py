@@ -1,11 +1,25 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime, date, time
+import time as clock
 import uuid
+import threading
+import sys
+import os
+import json
+import random
+import hmac
+import hashlib
+import base64
+import csv
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import altair as alt
 import bcrypt
 import gspread
+import requests
 from google.oauth2 import service_account
+import extra_streamlit_components as stx
 import toml
 
 # --- Privileged User Configuration ---
@@ -15,10 +29,74 @@ SUPER_PRIVILEGED_USERS = ['Charles D.B.']
 # Instructor certification levels for different functionalities
 INSTRUCTOR_CERT_LEVELS_FOR_LOGGING_FEEDBACK_SIDEBAR = ["NB", "A1", "A2", "A3", "S4", "I1", "I2", "I3"]
 INSTRUCTOR_CERT_LEVELS_FOR_ADMIN_TABS_AND_DROPDOWNS = ["A3", "S4", "I1", "I2", "I3"]
+# Certification levels from lowest to highest, as ordered in the statistics by level
+CERT_ORDER = ["NB", "A1", "A2", "A3", "S4", "I1", "I2", "I3"]
 
 # --- Discipline Configuration ---
 LOWER_IS_BETTER_DISCIPLINES = ["16x25m Speed Endurance"]
 
+# --- Dataset Configuration ---
+# One entry per worksheet: where it lives, its preferred column order, the maximum age of a cached snapshot
+# and the spinner shown while it is (re)loaded. Snapshots are reloaded earlier whenever their version marker moves.
+DATASETS = {
+    "training_log": {
+        "url_key": "training_log_sheet_url", "worksheet": "training_log",
+        "headers": ["id", "date", "place", "description", "club"],
+        "ttl": 3600*6, "spinner": "Chargement des activités...",
+    },
+    "records": {
+        "url_key": "records_sheet_url", "worksheet": "freediving_records",
+        "headers": ["id", "user", "entry_date", "discipline", "original_performance_str", "parsed_value", "linked_training_session_id", "comment", "club"],
+        "ttl": 3600*6, "spinner": "Chargement des performances...",
+    },
+    "user_profiles": {
+        "url_key": "user_profiles_sheet_url", "worksheet": "user_profiles",
+        "headers": ["user_name", "id", "certification", "certification_date", "lifras_id", "anonymize_results", "consent_ai_feedback", "motivations", "projection_3_ans", "portrait_photo_text", "hashed_password", "club", "club_owner"],
+        "ttl": 3600*6, "spinner": "Chargement des profils utilisateurs...",
+    },
+    "instructor_feedback": {
+        "url_key": "instructor_feedback_sheet_url", "worksheet": "instructor_feedback",
+        "headers": ["id", "feedback_date", "diver_name", "training_session_id", "instructor_name", "feedback_text", "club"],
+        "ttl": 3600*6, "spinner": "Chargement des feedbacks...",
+    },
+    "wishes": {
+        "url_key": "freediver_wishes_sheet_url", "worksheet": "FreediverWishes",
+        "headers": ["id", "user_name", "date", "description", "club"],
+        "ttl": 3600*6, "spinner": "Chargement des souhaits...",
+    },
+    "club_profiles": {
+        "url_key": "club_profiles_sheet_url", "worksheet": "ClubProfiles",
+        "headers": ["id", "club_name"],
+        "ttl": 3600*24, "spinner": "Chargement des profils de clubs...",
+    },
+}
+
+# Every save bumps the dataset's row in this worksheet; loaders compare it to the version of their snapshot.
+# The same row records the schema version each dataset was last migrated to.
+VERSIONS_WORKSHEET = "DataVersions"
+VERSIONS_HEADERS = ["dataset", "version", "updated_at", "schema_version"]
+VERSION_CHECK_SECONDS = 10
+# Used instead of the version check when the versions worksheet cannot be read.
+FALLBACK_DATASET_TTL_SECONDS = 60
+
+# Stale snapshots are served while they are re-read in the background. The prefetcher also polls
+# the version markers and re-reads cached datasets a few minutes before they reach their maximum age.
+PREFETCH_DATASETS = True
+PREFETCH_INTERVAL_SECONDS = 30
+PREFETCH_HEADROOM_SECONDS = 300
+PREFETCH_MIN_QUOTA_HEADROOM = 0.5
+
+# New sessions, performances, feedback and wishes are journaled to this file and appended to their worksheets
+# by a background flusher, so a form submit does not wait for Google Sheets.
+WRITE_QUEUE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".write_queue.jsonl")
+WRITE_QUEUE_COALESCE_SECONDS = 2
+WRITE_QUEUE_RETRY_SECONDS = 30
+
+# Saves re-read and merge at most this many times when other writers keep changing the dataset under them.
+WRITE_CONFLICT_RETRIES = 3
+# Times the DataStore reloads its rows when snapshots keep being swapped while they load.
+DATA_STORE_LOAD_ATTEMPTS = 3
+
 # --- Styling ---
 # New structure for badge configuration, aligning with st.badge(color, icon) and markdown badges
 # NOTE: For markdown badges (:color-badge[]), colors must be predefined names (red, green, blue, orange, violet, gray, etc.)
@@ -161,6 +239,10 @@ TRANSLATIONS = {
         "min_performance_col": "Perf. Min",
         "max_performance_col": "Perf. Max",
         "avg_performance_col": "Perf. Moyenne",
+        "median_performance_col": "Médiane",
+        "quartiles_performance_col": "Quartiles (25 % - 75 %)",
+        "range_performance_col": "Min - Max",
+        "freedivers_count_col": "Apnéistes",
         "no_stats_data": "Aucune donnée disponible pour les statistiques par brevet dans cette discipline.",
         "edit_action": "Modifier",
         "delete_action": "Supprimer",
@@ -295,6 +377,7 @@ TRANSLATIONS = {
         "suggestion_generation_error": "Désolé, la génération de la suggestion a échoué. Veuillez réessayer.",
         "api_call_error": "Erreur lors de l'appel à l'API de génération : {e}",
         "avg_performance_by_certification_header" : "📊 Performance Moyenne par Niveau de Brevet",
+        "performance_distribution_by_certification_header": "📊 Répartition des Performances par Niveau de Brevet",
         "freediver_certification_summary_header": "🔢 Apnéistes par Niveau de Brevet",
         "freediver_certification_chart_tab_label": "📊 Apnéistes par Brevet [A]",
         "count_col": "Nombre",
@@ -322,6 +405,18 @@ TRANSLATIONS = {
         "freediver_exists_error": "L'apnéiste '{user_name}' existe déjà.",
         "club_owner_missing_club": "En tant que propriétaire de club, vous devez avoir un club défini dans votre profil pour ajouter de nouveaux apnéistes.",
         "freediver_full_name_placeholder": "Prénom Nom (ex: Jean Dupont)",
+        "bulk_import_freedivers_header": "📋 Import groupé d'apnéistes",
+        "bulk_import_freedivers_help": "Un apnéiste par ligne : `Prénom Nom, certification, mot de passe`. Certification et mot de passe sont facultatifs ; sans mot de passe, l'apnéiste se connecte avec le mot de passe par défaut.",
+        "bulk_import_text_label": "Coller la liste (CSV)",
+        "bulk_import_file_label": "Ou importer un fichier CSV",
+        "bulk_import_button": "📥 Importer les apnéistes",
+        "bulk_import_empty_error": "Aucun apnéiste à importer.",
+        "bulk_import_line_error": "Ligne {line} : {error}",
+        "bulk_import_duplicate_error": "'{user_name}' apparaît plusieurs fois dans l'import.",
+        "bulk_import_invalid_certification_error": "certification '{certification}' inconnue.",
+        "bulk_import_password_too_long_error": "le mot de passe dépasse 72 octets.",
+        "bulk_import_name_separator_error": "le nom '{full_name}' contient un séparateur (',', ';' ou tabulation).",
+        "bulk_import_success": "{count} apnéiste(s) ajouté(s) au club '{club_name}' !",
         "motivations_placeholder": "Quelles sont mes motivations à pratiquer l'apnée ?",
         "projection_3_ans_placeholder": "Où me vois-je dans 3 ans en apnée ?",
         "portrait_photo_text_placeholder": "Il s'agit de la légende qui sera ajouté sous ton portrait d'apnéiste. Sens-toi libre ! Prose, humour, sérieux, ... C'est comme tu veux :)",
@@ -374,30 +469,879 @@ def get_gsheets_client():
         st.stop()
         return None
 
-def get_sheet_by_url(client, url, worksheet_name='Sheet1'):
+@st.cache_resource(ttl=3600)
+def open_spreadsheet(url):
+    return get_gsheets_client().open_by_url(url)
+
+@st.cache_resource(ttl=3600)
+def open_worksheet(url, worksheet_name):
+    """Worksheet handle registry: each (url, worksheet name) is opened once and reused by every read and write."""
+    return open_spreadsheet(url).worksheet(worksheet_name)
+
+# --- Sheets Quota ---
+# Google Sheets allows 60 read and 60 write requests per minute to a service account. Background work
+# (revalidation, prefetch, queued inserts) leaves a reserve of each for the requests users are waiting on.
+SHEETS_REQUESTS_PER_MINUTE = {"read": 60, "write": 60}
+SHEETS_BACKGROUND_RESERVE = {"read": 20, "write": 10}
+SHEETS_MAX_ATTEMPTS = 5
+SHEETS_BACKOFF_SECONDS = 1
+SHEETS_MAX_BACKOFF_SECONDS = 32
+
+@st.cache_resource
+def get_rate_limiter():
+    """
+    Process-wide token buckets, one per Sheets quota, refilled continuously up to one minute of quota.
+    `context.background` marks the threads whose requests must leave the reserve untouched.
+    """
+    return {
+        "condition": threading.Condition(),
+        "buckets": {kind: {"tokens": float(limit), "updated": clock.time()} for kind, limit in SHEETS_REQUESTS_PER_MINUTE.items()},
+        "context": threading.local(),
+    }
+
+def set_background_priority(background):
+    get_rate_limiter()["context"].background = background
+
+def is_background_priority():
+    return getattr(get_rate_limiter()["context"], "background", False)
+
+def refill_bucket(kind, bucket):
+    now = clock.time()
+    limit = SHEETS_REQUESTS_PER_MINUTE[kind]
+    bucket["tokens"] = min(limit, bucket["tokens"] + (now - bucket["updated"]) * limit / 60)
+    bucket["updated"] = now
+
+def acquire_quota(kind):
+    """Blocks until a `kind` ("read" or "write") request fits in the quota, keeping the reserve for interactive requests."""
+    limiter = get_rate_limiter()
+    reserve = SHEETS_BACKGROUND_RESERVE[kind] if is_background_priority() else 0
+    with limiter["condition"]:
+        bucket = limiter["buckets"][kind]
+        while True:
+            refill_bucket(kind, bucket)
+            if bucket["tokens"] >= reserve + 1:
+                bucket["tokens"] -= 1
+                return
+            limiter["condition"].wait((reserve + 1 - bucket["tokens"]) * 60 / SHEETS_REQUESTS_PER_MINUTE[kind])
+
+def get_quota_headroom():
+    """Share of each quota currently available, from 0 (exhausted) to 1 (a full minute of requests)."""
+    limiter = get_rate_limiter()
+    with limiter["condition"]:
+        headroom = {}
+        for kind, bucket in limiter["buckets"].items():
+            refill_bucket(kind, bucket)
+            headroom[kind] = bucket["tokens"] / SHEETS_REQUESTS_PER_MINUTE[kind]
+    return headroom
+
+def is_quota_error(e):
+    return isinstance(e, gspread.exceptions.APIError) and e.response.status_code == 429
+
+def is_retryable_error(e):
+    if isinstance(e, gspread.exceptions.APIError):
+        return e.response.status_code == 429 or e.response.status_code >= 500
+    return isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+def call_sheets(kind, call, idempotent=True):
+    """
+    Runs one Sheets request under the rate limiter.
+    Quota (429) and server errors are retried with jittered exponential backoff; a 429 also empties the bucket,
+    since our count of the remaining quota was evidently too optimistic.
+    Requests that must not run twice (`idempotent=False`, e.g. appends) are only retried after a 429, which is
+    returned before anything is applied: after a timeout or a server error they may have landed already.
+    """
+    for attempt in range(SHEETS_MAX_ATTEMPTS):
+        acquire_quota(kind)
+        try:
+            return call()
+        except Exception as e:
+            if not is_retryable_error(e) or attempt == SHEETS_MAX_ATTEMPTS - 1:
+                raise
+            if not idempotent and not is_quota_error(e):
+                raise
+            if is_quota_error(e):
+                limiter = get_rate_limiter()
+                with limiter["condition"]:
+                    limiter["buckets"][kind]["tokens"] = 0.0
+        backoff = min(SHEETS_MAX_BACKOFF_SECONDS, SHEETS_BACKOFF_SECONDS * 2 ** attempt)
+        clock.sleep(backoff * random.uniform(0.5, 1.5))
+
+# --- Dataset Versions ---
+@st.cache_resource
+def get_version_state():
+    """
+    Last version markers and schema versions read from the versions worksheet, with the sheet row holding each of them.
+    `unpublished` holds the datasets written since their last successful version bump; `checking` is set while
+    a background version check runs.
+    """
+    return {
+        "versions": None, "schema_versions": {}, "rows": {}, "checked_at": 0.0, "unpublished": set(),
+        "checking": False, "guard": threading.Lock(),
+    }
+
+def get_versions_sheet_url():
+    return st.secrets["gsheets"].get("data_versions_sheet_url", st.secrets["gsheets"]["records_sheet_url"])
+
+def read_versions_sheet(url):
     try:
-        spreadsheet = client.open_by_url(url)
-        return spreadsheet.worksheet(worksheet_name)
+        return run_on_sheet(url, VERSIONS_WORKSHEET, lambda sheet: sheet.get_all_values())
     except gspread.exceptions.WorksheetNotFound:
-        st.error(f"App en syncope. Merci d'oxygéner la page en la rafraichissant.")
-        st.stop()
+        def create(spreadsheet):
+            sheet = spreadsheet.add_worksheet(VERSIONS_WORKSHEET, rows=20, cols=len(VERSIONS_HEADERS))
+            sheet.update([VERSIONS_HEADERS])
+        run_on_spreadsheet(url, create, quota="write", idempotent=False)
+        return []
+
+def get_dataset_versions():
+    """
+    Returns {dataset: version} as published in the versions worksheet, re-read at most every VERSION_CHECK_SECONDS.
+    Returns None when the worksheet cannot be read, in which case loaders fall back to a short TTL.
+    Version bumps that failed earlier are retried once the worksheet is readable again.
+    """
+    state = get_version_state()
+    if clock.time() - state["checked_at"] < VERSION_CHECK_SECONDS:
+        return state["versions"]
+    state["checked_at"] = clock.time()
+    try:
+        values = read_versions_sheet(get_versions_sheet_url())
+    except Exception:
+        state["versions"] = None
         return None
+    versions, schema_versions, rows = {}, {}, {}
+    for row_number, row in enumerate(values[1:], start=2):
+        if row and row[0]:
+            versions[row[0]] = row[1] if len(row) > 1 else ""
+            schema_versions[row[0]] = int(row[3]) if len(row) > 3 and row[3].isdigit() else 0
+            rows[row[0]] = row_number
+    state["versions"], state["schema_versions"], state["rows"] = versions, schema_versions, rows
+    for name in list(state["unpublished"]):
+        bump_dataset_version(name)
+    return state["versions"]
+
+def get_known_versions():
+    """
+    The version markers last read, without waiting on Sheets. When they are older than VERSION_CHECK_SECONDS,
+    a background thread re-reads them and revalidates the cached datasets whose marker moved.
+    """
+    state = get_version_state()
+    if clock.time() - state["checked_at"] >= VERSION_CHECK_SECONDS:
+        start_version_check()
+    return state["versions"]
+
+def start_version_check():
+    state = get_version_state()
+    with state["guard"]:
+        if state["checking"]:
+            return
+        state["checking"] = True
+
+    def check():
+        set_background_priority(True)
+        try:
+            get_dataset_versions()
+            stale = [name for name in list(get_dataset_cache()) if is_dataset_stale(name)]
+            if stale:
+                revalidate_datasets(stale)
+        except Exception:
+            pass  # The markers last read keep being used; the next rerun starts another check.
+        finally:
+            with state["guard"]:
+                state["checking"] = False
+
+    threading.Thread(target=check, daemon=True).start()
+
+def get_published_version(name):
+    """The version marker of a dataset as last read from the versions worksheet, "" when unknown."""
+    versions = get_dataset_versions()
+    return versions.get(name, "") if versions else ""
+
+def bump_dataset_version(name):
+    """
+    Publishes a new version marker after a write, so other processes reload the dataset on their next check.
+    A failed bump leaves the dataset in `unpublished`, retried on the next versions check and shown to users until it succeeds.
+    """
+    state = get_version_state()
+    version = uuid.uuid4().hex
+    row_number = state["rows"].get(name)
+    values = [name, version, datetime.now().isoformat()]
+
+    def bump(sheet):
+        if row_number:
+            sheet.update(range_name=f"A{row_number}:C{row_number}", values=[values])
+        else:
+            sheet.append_row(values)
+
+    try:
+        run_on_sheet(get_versions_sheet_url(), VERSIONS_WORKSHEET, bump, quota="write", idempotent=bool(row_number))
+    except Exception:
+        state["unpublished"].add(name)
+        return state["versions"].get(name, "") if state["versions"] else ""
+    state["unpublished"].discard(name)
+    if state["versions"] is not None:
+        state["versions"][name] = version
+    if not row_number:
+        state["checked_at"] = 0.0
+    return version
+
+# --- Dataset Cache ---
+@st.cache_resource
+def get_dataset_cache():
+    """Process-wide snapshots of every dataset, shared by all sessions and kept in sync by the save/append paths."""
+    return {}
+
+def is_stale_handle_error(e):
+    if isinstance(e, gspread.exceptions.WorksheetNotFound):
+        return True
+    if isinstance(e, gspread.exceptions.APIError):
+        return e.response.status_code == 401 or "Unable to parse range" in str(e)
+    return False
+
+def reset_handles(url, error):
+    open_spreadsheet.clear(url)
+    open_worksheet.clear()
+    if isinstance(error, gspread.exceptions.APIError) and error.response.status_code == 401:
+        get_gsheets_client.clear()
+        open_spreadsheet.clear()
+
+def run_on_sheet(url, worksheet_name, operation, quota="read", idempotent=True):
+    """
+    Runs `operation(sheet)` on the cached worksheet handle, counted against the `quota` ("read" or "write") bucket.
+    If the handle went stale (expired credentials, renamed or recreated worksheet), it is reopened once and the operation retried.
+    `idempotent=False` limits the retries of operations that must not run twice (see call_sheets).
+    """
+    try:
+        return call_sheets(quota, lambda: operation(open_worksheet(url, worksheet_name)), idempotent)
     except Exception as e:
-        st.error(f"App en syncope. Merci d'oxygéner la page en la rafraichissant.")
-        st.exception(e)
-        st.stop()
-        return None
+        if not is_stale_handle_error(e):
+            raise
+        reset_handles(url, e)
+        return call_sheets(quota, lambda: operation(open_worksheet(url, worksheet_name)), idempotent)
+
+def run_on_spreadsheet(url, operation, quota="read", idempotent=True):
+    """Same as `run_on_sheet`, for operations spanning several worksheets of one spreadsheet."""
+    try:
+        return call_sheets(quota, lambda: operation(open_spreadsheet(url)), idempotent)
+    except Exception as e:
+        if not is_stale_handle_error(e):
+            raise
+        reset_handles(url, e)
+        return call_sheets(quota, lambda: operation(open_spreadsheet(url)), idempotent)
+
+def run_dataset_operation(name, operation, quota="read", idempotent=True):
+    config = DATASETS[name]
+    url = st.secrets["gsheets"][config["url_key"]]
+    return run_on_sheet(url, config["worksheet"], operation, quota, idempotent)
+
+def parse_dataset_values(values):
+    """
+    Splits a worksheet grid into its header row, its data rows as displayed cell text,
+    and the same record dicts `get_all_records` would produce.
+    """
+    if not values:
+        return [], [], []
+    headers = values[0]
+    cells = [(row + [""] * (len(headers) - len(row)))[:len(headers)] for row in values[1:]]
+    records = [dict(zip(headers, gspread.utils.numericise_all(row))) for row in cells]
+    return headers, cells, records
+
+def read_dataset(name):
+    """Reads a whole worksheet in one call."""
+    return parse_dataset_values(run_dataset_operation(name, lambda sheet: sheet.get_all_values()))
+
+def store_dataset(name, headers, cells, rows, normalized=True, version=None):
+    """
+    Makes a copy of `rows` the cached snapshot of a dataset. Snapshots are shared by every session and never
+    modified in place: writes store a new one.
+    `cells` mirrors what the worksheet holds under `headers`, one list per sheet row, and is what later writes are diffed against.
+    Freshly read rows are stored with `normalized=False` and back-filled by the dataset's loader on first use.
+    `version` is the marker published before `rows` were read, so a write landing during the read leaves the snapshot
+    stale instead of marking it current. It defaults to the marker known now, which is the one of our own writes.
+    """
+    if version is None:
+        known_versions = get_version_state()["versions"] or {}
+        version = known_versions.get(name, "")
+    row_ids = {row.get('id') for row in rows}
+    rows = list(rows) + [row for row in get_pending_rows(name) if row.get('id') not in row_ids]
+    entry = {
+        "headers": list(headers), "cells": [list(row) for row in cells],
+        "rows": [dict(row) for row in rows], "loaded_at": clock.time(), "normalized": normalized,
+        "version": version, "revision": uuid.uuid4().hex, "views": {}
+    }
+    get_dataset_cache()[name] = entry
+    return entry
+
+@st.cache_resource
+def get_fetch_state():
+    """
+    One lock per dataset, so concurrent cache misses wait for a single worksheet read and share its result,
+    plus counters of the reads actually made and of the misses that were served by another session's read.
+    """
+    return {
+        "locks": {name: threading.RLock() for name in DATASETS},
+        "fetches": {name: 0 for name in DATASETS},
+        "coalesced": {name: 0 for name in DATASETS},
+        "revalidating": set(), "guard": threading.Lock(),
+    }
+
+def get_fetch_stats():
+    fetch_state = get_fetch_state()
+    return sum(fetch_state["fetches"].values()), sum(fetch_state["coalesced"].values())
+
+def is_dataset_stale(name, headroom=0):
+    """
+    A snapshot is stale when its version marker moved, or when it outlived its maximum age.
+    `headroom` counts snapshots that reach that age within the next `headroom` seconds as stale already.
+    Background threads check the versions worksheet; interactive reruns compare with the markers last read
+    and leave that check to a background thread, so they never wait on Sheets for a cached dataset.
+    """
+    entry = get_dataset_cache().get(name)
+    if entry is None:
+        return True
+    age = clock.time() - entry["loaded_at"] + headroom
+    versions = get_dataset_versions() if is_background_priority() else get_known_versions()
+    if versions is None:
+        return age > FALLBACK_DATASET_TTL_SECONDS
+    return entry["version"] != versions.get(name, "") or age > DATASETS[name]["ttl"]
+
+def get_dataset(name, normalize=None):
+    """
+    Returns the cached rows of a dataset. A missing snapshot is read under the spinner; a stale one is served
+    as is while it is re-read in the background.
+    `normalize` coerces freshly read rows in place, once per snapshot. It never writes: persisting back-filled
+    fields is the job of the schema migrations.
+    Callers must not mutate the returned rows.
+    """
+    fetch_state = get_fetch_state()
+    if name in get_dataset_cache():
+        if is_dataset_stale(name):
+            revalidate_datasets([name])
+    else:
+        with fetch_state["locks"][name]:
+            if name not in get_dataset_cache():
+                with st.spinner(DATASETS[name]["spinner"]):
+                    version = get_published_version(name)
+                    store_dataset(name, *read_dataset(name), normalized=False, version=version)
+                fetch_state["fetches"][name] += 1
+            else:
+                fetch_state["coalesced"][name] += 1
+    entry = get_dataset_cache()[name]
+    if not entry["normalized"]:
+        with fetch_state["locks"][name]:
+            entry = get_dataset_cache()[name]
+            if not entry["normalized"]:
+                if normalize:
+                    normalize(entry["rows"])
+                entry["normalized"] = True
+    return entry["rows"]
+
+def get_dataset_view(name, view, build, normalize=None):
+    """Returns `build(rows)` for the current snapshot of a dataset, computed once per snapshot and shared like its rows."""
+    get_dataset(name, normalize)
+    entry = get_dataset_cache()[name]
+    if view not in entry["views"]:
+        entry["views"][view] = build(entry["rows"])
+    return entry["views"][view]
+
+def prefetch_datasets(names, headroom=0):
+    """
+    Reads the given worksheets that are still stale once their locks are held, and caches them un-normalized.
+    Datasets sharing a spreadsheet come back from a single values_batch_get, and distinct spreadsheets
+    are fetched concurrently, so a cold load costs about one round trip.
+    Holds the locks of every requested dataset, so sessions missing at the same time share one read.
+    """
+    fetch_state = get_fetch_state()
+    locks = [fetch_state["locks"][name] for name in sorted(names)]
+    for lock in locks:
+        lock.acquire()
+    try:
+        stale = []
+        for name in names:
+            if is_dataset_stale(name, headroom):
+                stale.append(name)
+            else:
+                fetch_state["coalesced"][name] += 1
+        if stale:
+            fetch_datasets(stale)
+            for name in stale:
+                fetch_state["fetches"][name] += 1
+    finally:
+        for lock in reversed(locks):
+            lock.release()
+
+def fetch_datasets(names):
+    names_by_url = {}
+    for name in names:
+        names_by_url.setdefault(st.secrets["gsheets"][DATASETS[name]["url_key"]], []).append(name)
+    background = is_background_priority()
+    versions = {name: get_published_version(name) for name in names}
+
+    def fetch(url):
+        set_background_priority(background)
+        ranges = [gspread.utils.absolute_range_name(DATASETS[name]["worksheet"]) for name in names_by_url[url]]
+        response = run_on_spreadsheet(url, lambda spreadsheet: spreadsheet.values_batch_get(ranges))
+        return [value_range.get("values", []) for value_range in response.get("valueRanges", [])]
+
+    with ThreadPoolExecutor(max_workers=len(names_by_url)) as pool:
+        values_by_url = dict(zip(names_by_url, pool.map(fetch, names_by_url)))
+    for url, grids in values_by_url.items():
+        for name, values in zip(names_by_url[url], grids):
+            store_dataset(name, *parse_dataset_values(values), normalized=False, version=versions[name])
+
+def revalidate_datasets(names, headroom=0):
+    """Re-reads the given datasets in a background thread, unless a refresh of them is already running."""
+    fetch_state = get_fetch_state()
+    with fetch_state["guard"]:
+        names = [name for name in names if name not in fetch_state["revalidating"]]
+        fetch_state["revalidating"].update(names)
+    if not names:
+        return
+
+    def revalidate():
+        set_background_priority(True)
+        try:
+            prefetch_datasets(names, headroom)
+        except Exception:
+            pass  # The stale snapshot keeps being served; the next rerun or prefetch retries.
+        finally:
+            with fetch_state["guard"]:
+                fetch_state["revalidating"].difference_update(names)
+
+    threading.Thread(target=revalidate, daemon=True).start()
+
+@st.cache_resource
+def start_dataset_prefetcher():
+    """Starts the process-wide thread that keeps cached datasets fresh ahead of the reruns that need them."""
+    def prefetch_loop():
+        set_background_priority(True)
+        while True:
+            clock.sleep(PREFETCH_INTERVAL_SECONDS)
+            # Warming up is optional: skip rounds while users need most of the read quota
+            if get_quota_headroom()["read"] < PREFETCH_MIN_QUOTA_HEADROOM:
+                continue
+            try:
+                due = [
+                    name for name in list(get_dataset_cache())
+                    if is_dataset_stale(name, PREFETCH_HEADROOM_SECONDS)
+                ]
+                if due:
+                    prefetch_datasets(due, PREFETCH_HEADROOM_SECONDS)
+            except Exception:
+                pass
+
+    thread = threading.Thread(target=prefetch_loop, daemon=True)
+    thread.start()
+    return thread
+
+def load_all_datasets():
+    """
+    Loads every dataset used by main_app.
+    Missing worksheets are fetched in parallel first; records are then cleaned up against the training log snapshot.
+    """
+    run_startup_migrations()
+    start_write_flusher()
+    if PREFETCH_DATASETS:
+        start_dataset_prefetcher()
+    dataset_cache = get_dataset_cache()
+    missing = [name for name in DATASETS if name not in dataset_cache]
+    if len(missing) > 1:
+        with st.spinner("Chargement des données..."):
+            try:
+                prefetch_datasets(missing)
+            except Exception as e:
+                st.error(f"App en syncope. Merci d'oxygéner la page en la rafraichissant.")
+                st.exception(e)
+                st.stop()
+    stale = [name for name in DATASETS if name in dataset_cache and is_dataset_stale(name)]
+    if stale:
+        revalidate_datasets(stale)
+
+    return (
+        load_training_log(),
+        load_records(),
+        load_user_profiles(),
+        load_instructor_feedback(),
+        load_wishes(),
+        load_club_profiles(),
+    )
+
+def to_sheet_cell(value):
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return ""
+    return value
+
+def to_cell_text(value):
+    """Renders a value the way the worksheet displays it once written, so rows can be compared cell by cell."""
+    value = to_sheet_cell(value)
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def append_dataset_rows(name, new_rows):
+    """
+    Inserts rows at the bottom of a worksheet and of its cached snapshot, without rewriting the sheet.
+    Columns the sheet does not have yet are added to the end of its header row first.
+    """
+    entry = get_dataset_cache().get(name)
+
+    def append(sheet):
+        headers = list(entry["headers"]) if entry else sheet.row_values(1)
+
+        new_keys = {key for row in new_rows for key in row if key not in headers}
+        missing_headers = [h for h in DATASETS[name]["headers"] if h in new_keys or not headers] + sorted(new_keys - set(DATASETS[name]["headers"]))
+        if missing_headers:
+            sheet.update(range_name=gspread.utils.rowcol_to_a1(1, len(headers) + 1), values=[missing_headers])
+            headers += missing_headers
+
+        sheet.append_rows([[to_sheet_cell(row.get(h)) for h in headers] for row in new_rows], value_input_option="RAW")
+        return headers
+
+    try:
+        headers = run_dataset_operation(name, append, quota="write", idempotent=False)
+    except Exception as e:
+        if is_retryable_error(e) and not is_quota_error(e):
+            # The append may have landed before the error: re-read the sheet, so a retry skips the rows it holds
+            try:
+                with get_fetch_state()["locks"][name]:
+                    version = get_published_version(name)
+                    store_dataset(name, *read_dataset(name), normalized=False, version=version)
+            except Exception:
+                pass
+        raise
+    version = bump_dataset_version(name)
+
+    if entry:
+        # Rows queued earlier are already in the snapshot: only the sheet mirror gains them
+        row_ids = {row.get('id') for row in entry["rows"]}
+        added_rows = [dict(row) for row in new_rows if row.get('id') not in row_ids]
+        get_dataset_cache()[name] = dict(
+            entry, version=version, revision=uuid.uuid4().hex, headers=headers, views={},
+            cells=entry["cells"] + [[to_cell_text(row.get(h)) for h in headers] for row in new_rows],
+            rows=entry["rows"] + added_rows,
+        )
+        notify_dataset_changes(name, entry, get_dataset_cache()[name], upserted=added_rows)
+
+def plan_dataset_layout(old_cells, headers, rows):
+    """
+    Decides which sheet row each of `rows` goes to, keeping rows at the position they already occupy.
+    New rows fill the slots of deleted ones first; remaining holes are closed by moving rows up from the bottom,
+    so a write touches a number of sheet rows proportional to the edit, not to the sheet.
+    """
+    id_col = headers.index("id")
+    rows_by_id = {}
+    rows_without_id = []
+    for row in rows:
+        row_id = to_cell_text(row.get("id"))
+        if not row_id or row_id in rows_by_id:
+            rows_without_id.append(row)
+        else:
+            rows_by_id[row_id] = row
+
+    slots = []
+    for cells in old_cells:
+        row_id = cells[id_col] if id_col < len(cells) else ""
+        slots.append(rows_by_id.pop(row_id, None) if row_id else None)
+
+    holes = [i for i, row in enumerate(slots) if row is None]
+    for row in list(rows_by_id.values()) + rows_without_id:
+        if holes:
+            slots[holes.pop(0)] = row
+        else:
+            slots.append(row)
+
+    for hole in holes:
+        while slots and slots[-1] is None:
+            slots.pop()
+        if hole >= len(slots):
+            break
+        slots[hole] = slots.pop()
+    while slots and slots[-1] is None:
+        slots.pop()
+    return slots
+
+def is_snapshot_current(name, entry):
+    """
+    Compare step of the write path: True when nobody published a write to the dataset since `entry` was stored.
+    False when the versions worksheet cannot be read, as nothing then proves the snapshot current.
+    """
+    get_version_state()["checked_at"] = 0.0
+    versions = get_dataset_versions()
+    return versions is not None and versions.get(name, "") == entry["version"]
+
+def merge_dataset_rows(base_rows, my_rows, their_rows):
+    """
+    Three-way merge by `id` of a save computed from `base_rows` into the rows another writer saved meanwhile.
+    Fields this save changed win; fields it left alone keep their values, and rows it did not know about are kept.
+    Rows deleted by this save stay deleted, as do rows deleted by the other writer that this save did not change.
+    """
+    base_by_id = {row['id']: row for row in base_rows if row.get('id')}
+    mine_by_id = {row['id']: row for row in my_rows if row.get('id')}
+    their_ids = {row.get('id') for row in their_rows}
+
+    merged = []
+    for theirs in their_rows:
+        row_id = theirs.get('id')
+        mine = mine_by_id.get(row_id)
+        if mine is None:
+            if row_id not in base_by_id:
+                merged.append(theirs)
+            continue
+        base = base_by_id.get(row_id, {})
+        row = dict(theirs)
+        for key, value in mine.items():
+            if to_cell_text(base.get(key)) != to_cell_text(value):
+                row[key] = value
+        merged.append(row)
+
+    for mine in my_rows:
+        row_id = mine.get('id')
+        if row_id in their_ids:
+            continue
+        base = base_by_id.get(row_id)
+        if base is None or any(to_cell_text(base.get(key)) != to_cell_text(value) for key, value in mine.items()):
+            merged.append(mine)
+    return merged
+
+def write_dataset(name, rows, base_entry=None):
+    """
+    Saves a whole dataset with a compare-and-swap on its version marker.
+    `base_entry` is the snapshot these rows were computed from (see DataStore.snapshots); it defaults to the
+    current one. If the dataset changed since, locally or in another process, the sheet is re-read as needed
+    and this save is merged into it (see merge_dataset_rows) before writing.
+    When the versions worksheet cannot be read, the sheet is always re-read before the merge.
+    Queued inserts of the dataset are flushed first, so they are not written twice.
+    """
+    flush_write_queue([name], raise_errors=True)
+    if base_entry is None:
+        base_entry = get_dataset_cache().get(name)
+    with get_fetch_state()["locks"][name]:
+        entry = get_dataset_cache().get(name)
+        for _attempt in range(WRITE_CONFLICT_RETRIES):
+            if entry is not None and is_snapshot_current(name, entry):
+                break
+            version = get_published_version(name)
+            entry = store_dataset(name, *read_dataset(name), normalized=False, version=version)
+            if get_version_state()["versions"] is None:
+                break  # No marker to compare: the sheet just read is the freshest base there is
+        if base_entry is not None and entry is not base_entry:
+            rows = merge_dataset_rows(base_entry["rows"], rows, entry["rows"])
+        write_dataset_rows(name, rows, entry)
+
+def write_dataset_rows(name, rows, entry):
+    """
+    Writes `rows` over the worksheet last seen as `entry`, sending only the rows that differ in one batched update.
+    Rows are matched by `id`. Falls back to a full rewrite when there is no snapshot or the columns changed.
+    """
+    preferred_headers = DATASETS[name]["headers"]
+    all_keys = set()
+    for row in rows:
+        all_keys.update(row.keys())
+
+    headers = entry["headers"] if entry else []
+    if not headers or "id" not in headers or not all_keys <= set(headers):
+        headers = preferred_headers + sorted(all_keys - set(preferred_headers))
+        new_cells = [[to_cell_text(row.get(h)) for h in headers] for row in rows]
+        values_to_write = [headers] + [[to_sheet_cell(row.get(h)) for h in headers] for row in rows]
+
+        def rewrite(sheet):
+            sheet.clear()
+            sheet.update(values_to_write)
+
+        run_dataset_operation(name, rewrite, quota="write")
+        bump_dataset_version(name)
+        store_dataset(name, headers, new_cells, rows, normalized=False)
+        return
+
+    old_cells = entry["cells"]
+    slots = plan_dataset_layout(old_cells, headers, rows)
+    new_cells = [[to_cell_text(row.get(h)) for h in headers] for row in slots]
+
+    changed = []
+    for i in range(max(len(old_cells), len(new_cells))):
+        old_row = old_cells[i] + [""] * (len(headers) - len(old_cells[i])) if i < len(old_cells) else None
+        if i >= len(new_cells):
+            if any(old_row):
+                changed.append((i, [""] * len(headers)))
+        elif old_row != new_cells[i]:
+            changed.append((i, [to_sheet_cell(slots[i].get(h)) for h in headers]))
+
+    batch = []
+    for i, values in changed:
+        if batch and batch[-1]["last"] == i - 1:
+            batch[-1]["values"].append(values)
+            batch[-1]["last"] = i
+        else:
+            batch.append({"first": i, "last": i, "values": [values]})
+    if batch:
+        run_dataset_operation(name, lambda sheet: sheet.batch_update([
+            {
+                "range": f"{gspread.utils.rowcol_to_a1(block['first'] + 2, 1)}:{gspread.utils.rowcol_to_a1(block['last'] + 2, len(headers))}",
+                "values": block["values"]
+            }
+            for block in batch
+        ]), quota="write")
+        bump_dataset_version(name)
+    new_entry = store_dataset(name, headers, new_cells, slots, normalized=False)
+
+    # Rows that moved or changed are the sheet rows rewritten; ids that were there and are nowhere now were deleted
+    id_col = headers.index("id")
+    upserted = [new_entry["rows"][i] for i, _values in changed if i < len(slots)]
+    upserted_ids = {to_cell_text(row.get('id')) for row in upserted}
+    deleted_ids = [
+        old_cells[i][id_col] for i, _values in changed
+        if i < len(old_cells) and id_col < len(old_cells[i]) and old_cells[i][id_col] and old_cells[i][id_col] not in upserted_ids
+    ]
+    notify_dataset_changes(name, entry, new_entry, upserted=upserted, deleted_ids=deleted_ids)
+
+def notify_dataset_changes(name, base_entry, entry, upserted=(), deleted_ids=()):
+    """
+    Tells the structures maintained incrementally from a dataset how a local write took its snapshot from `base_entry`
+    to `entry`: rows inserted or updated, and ids deleted. Only the records dataset has one, the PB table.
+    """
+    if name == "records":
+        update_personal_bests(base_entry, entry, upserted, deleted_ids)
+
+# --- Write Queue ---
+@st.cache_resource
+def get_write_queue():
+    """
+    Inserts waiting to be appended to their worksheet, replayed from the journal file when the process starts.
+    `flush_lock` serializes flushes, `wake` tells the flusher there is something new.
+    """
+    entries = []
+    if os.path.exists(WRITE_QUEUE_PATH):
+        with open(WRITE_QUEUE_PATH, encoding="utf-8") as journal:
+            entries = [json.loads(line) for line in journal if line.strip()]
+    return {"entries": entries, "lock": threading.Lock(), "flush_lock": threading.Lock(), "wake": threading.Event()}
+
+def rewrite_write_queue_journal(entries):
+    """Replaces the journal with `entries`. Must be called with the queue lock held."""
+    temp_path = WRITE_QUEUE_PATH + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as journal:
+        for queued in entries:
+            journal.write(json.dumps(queued, default=str) + "\n")
+        journal.flush()
+        os.fsync(journal.fileno())
+    os.replace(temp_path, WRITE_QUEUE_PATH)
+
+def get_pending_rows(name):
+    """Rows queued for `name` and not yet appended to its worksheet."""
+    queue = get_write_queue()
+    with queue["lock"]:
+        return [row for queued in queue["entries"] if queued["dataset"] == name for row in queued["rows"]]
+
+def get_write_queue_status(user_name):
+    """Returns how many inserts of `user_name` are still queued, and how many of them failed at least once."""
+    queue = get_write_queue()
+    with queue["lock"]:
+        own = [queued for queued in queue["entries"] if queued.get("user") == user_name]
+    return len(own), sum(1 for queued in own if queued.get("error"))
+
+def queue_dataset_rows(name, new_rows):
+    """
+    Journals rows to insert into a dataset and shows them in its snapshot right away.
+    The background flusher appends them to the worksheet shortly after.
+    """
+    queue = get_write_queue()
+    queued = {
+        "id": uuid.uuid4().hex, "dataset": name, "rows": [dict(row) for row in new_rows],
+        "user": st.session_state.get("name"), "queued_at": datetime.now().isoformat(), "error": None
+    }
+    with queue["lock"]:
+        with open(WRITE_QUEUE_PATH, "a", encoding="utf-8") as journal:
+            journal.write(json.dumps(queued, default=str) + "\n")
+            journal.flush()
+            os.fsync(journal.fileno())
+        queue["entries"].append(queued)
+
+    entry = get_dataset_cache().get(name)
+    if entry:
+        added_rows = [dict(row) for row in new_rows]
+        get_dataset_cache()[name] = dict(entry, revision=uuid.uuid4().hex, views={}, rows=entry["rows"] + added_rows)
+        notify_dataset_changes(name, entry, get_dataset_cache()[name], upserted=added_rows)
+    start_write_flusher()
+    queue["wake"].set()
+
+def flush_write_queue(names=None, raise_errors=False):
+    """
+    Appends the queued rows of the given datasets (all by default) with one append per worksheet,
+    then drops them from the journal. Failed datasets keep their rows queued, flagged with the error.
+    """
+    queue = get_write_queue()
+    with queue["flush_lock"]:
+        with queue["lock"]:
+            batch = [queued for queued in queue["entries"] if names is None or queued["dataset"] in names]
+        entries_by_dataset = {}
+        for queued in batch:
+            entries_by_dataset.setdefault(queued["dataset"], []).append(queued)
+
+        for name, dataset_entries in entries_by_dataset.items():
+            rows = [row for queued in dataset_entries for row in queued["rows"]]
+            try:
+                # After a crash between the append and the journal rewrite, or an append whose response was lost,
+                # some rows may already be in the sheet: they are checked against a snapshot read after that happened
+                entry = get_dataset_cache().get(name)
+                if entry is None or any(queued.get("error") for queued in dataset_entries):
+                    with get_fetch_state()["locks"][name]:
+                        version = get_published_version(name)
+                        entry = store_dataset(name, *read_dataset(name), normalized=False, version=version)
+                if "id" in entry["headers"]:
+                    id_column = entry["headers"].index("id")
+                    sent_ids = {cells[id_column] for cells in entry["cells"] if len(cells) > id_column}
+                    rows = [row for row in rows if str(row.get('id')) not in sent_ids]
+                if rows:
+                    append_dataset_rows(name, rows)
+            except Exception as e:
+                with queue["lock"]:
+                    for queued in dataset_entries:
+                        queued["error"] = str(e)
+                    rewrite_write_queue_journal(queue["entries"])
+                if raise_errors:
+                    raise
+                continue
+            flushed_ids = {queued["id"] for queued in dataset_entries}
+            with queue["lock"]:
+                queue["entries"] = [queued for queued in queue["entries"] if queued["id"] not in flushed_ids]
+                rewrite_write_queue_journal(queue["entries"])
+
+@st.cache_resource
+def start_write_flusher():
+    """Starts the process-wide thread appending queued rows, a few seconds after each submit so bursts share one append."""
+    queue = get_write_queue()
+
+    def flush_loop():
+        set_background_priority(True)
+        while True:
+            queue["wake"].wait(timeout=WRITE_QUEUE_RETRY_SECONDS)
+            queue["wake"].clear()
+            clock.sleep(WRITE_QUEUE_COALESCE_SECONDS)
+            try:
+                flush_write_queue()
+            except Exception:
+                pass
+
+    thread = threading.Thread(target=flush_loop, daemon=True)
+    thread.start()
+    if queue["entries"]:
+        queue["wake"].set()
+    return thread
 
 # --- Data Handling for Performance Records ---
-@st.cache_data(ttl=60, show_spinner="Chargement des performances...")
-def load_records(training_logs):
-    client = get_gsheets_client()
-    sheet = get_sheet_by_url(client, st.secrets["gsheets"]["records_sheet_url"], 'freediving_records')
-    records = sheet.get_all_records()
+def get_training_session_ids():
+    """Ids of the sessions in the cached training log snapshot."""
+    logs = get_dataset("training_log", normalize=normalize_training_log)
+    return {log['id'] for log in logs if log.get('id')}
 
+def normalize_records(records):
+    """
+    Back-fills missing fields and drops the legacy event fields of records linked to a known training session.
+    The session ids are indexed once per call, so this stays linear in records + sessions.
+    """
     updated = False
+    session_ids = get_training_session_ids()
     for record in records:
-        if record.get('id') is None:
+        if not record.get('id'):
             record['id'] = uuid.uuid4().hex
             updated = True
         if 'entry_date' not in record:
@@ -413,54 +1357,32 @@ def load_records(training_logs):
             record['club'] = ''
             updated = True
 
-        if record.get('linked_training_session_id') in {log['id'] for log in training_logs}:
-            if 'event_name' in record:
-                del record['event_name']
-                updated = True
-            if 'event_date' in record:
-                del record['event_date']
-                updated = True
-            if 'date' in record:
-                del record['date']
-                updated = True
-    return records
-
-def save_records(records):
-    client = get_gsheets_client()
-    sheet = get_sheet_by_url(client, st.secrets["gsheets"]["records_sheet_url"], 'freediving_records')
+        if record.get('linked_training_session_id') in session_ids:
+            for legacy_field in ['event_name', 'event_date', 'date']:
+                if legacy_field in record:
+                    del record[legacy_field]
+                    updated = True
+    return updated
 
-    headers = ["id", "user", "entry_date", "discipline", "original_performance_str", "parsed_value", "linked_training_session_id", "comment", "club"]
+def load_records():
+    return get_dataset("records", normalize=normalize_records)
 
-    if not records:
-        sheet.clear()
-        sheet.update([headers])
-        return
-
-    all_keys = set()
-    for record in records:
-        all_keys.update(record.keys())
-    
-    final_headers = headers + [key for key in all_keys if key not in headers]
-    
-    data_to_write = [final_headers] + [[record.get(h, "") for h in final_headers] for record in records]
+def save_records(records, base_entry=None):
+    write_dataset("records", records, base_entry)
 
-    sheet.clear()
-    sheet.update(data_to_write)
-    load_records.clear()
+def add_records(new_records):
+    queue_dataset_rows("records", new_records)
 
 
 # --- Data Handling for User Profiles ---
-@st.cache_data(ttl=60, show_spinner="Chargement des profils utilisateurs...")
-def load_user_profiles():
-    client = get_gsheets_client()
-    sheet = get_sheet_by_url(client, st.secrets["gsheets"]["user_profiles_sheet_url"], 'user_profiles')
-    profiles_list = sheet.get_all_records()
-    profiles = {p['user_name']: p for p in profiles_list if 'user_name' in p}
-
+def normalize_user_profiles(profiles_list):
     updated = False
 
-    for user_name, profile_data in profiles.items():
-        if profile_data.get('id') is None:
+    for profile_data in profiles_list:
+        if 'user_name' not in profile_data:
+            continue
+
+        if not profile_data.get('id'):
             profile_data['id'] = uuid.uuid4().hex
             updated = True
 
@@ -472,9 +1394,9 @@ def load_user_profiles():
             profile_data['club_owner'] = False
             updated = True
         
+        # Booleans always come back from the sheet as text: coercing them is not a change to write back
         if isinstance(profile_data.get('club_owner'), str):
             profile_data['club_owner'] = profile_data['club_owner'].lower() == 'true'
-            updated = True
 
 
         for bool_field in ['anonymize_results', 'consent_ai_feedback']:
@@ -500,282 +1422,901 @@ def load_user_profiles():
             elif not isinstance(val, bool):
                 profile_data[bool_field] = bool(val) # Ensure it's a proper boolean
 
-    if updated:
-        save_user_profiles(profiles)
-        
-    return profiles
-
-def save_user_profiles(profiles):
-    client = get_gsheets_client()
-    sheet = get_sheet_by_url(client, st.secrets["gsheets"]["user_profiles_sheet_url"], 'user_profiles')
-
-    profiles_list = list(profiles.values())
-    if not profiles_list:
-        sheet.clear()
-        return
-
-    # Ensure each profile has a 'user_name' key for consistency before writing
-    for name, profile in profiles.items():
-        profile['user_name'] = name
-
-    expected_headers = [
-        "user_name", "id", "certification", "certification_date",
-        "lifras_id", "anonymize_results", "consent_ai_feedback",
-        "motivations", "projection_3_ans", "portrait_photo_text",
-        "hashed_password",
-        "club",
-        "club_owner"
-    ]
+    return updated
 
-    data_to_write = [expected_headers]
-    for profile_data in profiles_list:
-        row = []
+def load_user_profiles():
+    return get_dataset_view(
+        "user_profiles", "by_name", lambda rows: {p['user_name']: p for p in rows if 'user_name' in p},
+        normalize=normalize_user_profiles
+    )
+
+def save_user_profiles(profiles, base_entry=None):
+    expected_headers = DATASETS["user_profiles"]["headers"]
+
+    rows_to_write = []
+    for name, profile_data in profiles.items():
+        # Ensure each profile has a 'user_name' key for consistency before writing
+        profile_data = dict(profile_data, user_name=name)
+        row = {}
         for header in expected_headers:
             if header == "consent_ai_feedback" or header == "anonymize_results" or header == "club_owner":
-                row.append(bool(profile_data.get(header, False)))
+                row[header] = bool(profile_data.get(header, False))
             elif header == "certification_date":
                 date_val = profile_data.get(header)
-                row.append(date_val if pd.notna(date_val) else None)
-            elif header == "hashed_password":
-                row.append(profile_data.get(header, ''))
-            elif header == "club":
-                row.append(profile_data.get(header, ''))
+                row[header] = date_val if pd.notna(date_val) else None
             else:
-                row.append(profile_data.get(header, ""))
-        data_to_write.append(row)
+                row[header] = profile_data.get(header, "")
+        rows_to_write.append(row)
 
-    sheet.clear()
-    sheet.update(data_to_write)
-    load_user_profiles.clear()
-    get_auth_config.clear()
+    write_dataset("user_profiles", rows_to_write, base_entry)
 
-# --- Data Handling for Training Logs ---
-@st.cache_data(ttl=60, show_spinner="Chargement des activités...")
-def load_training_log():
-    client = get_gsheets_client()
-    sheet = get_sheet_by_url(client, st.secrets["gsheets"]["training_log_sheet_url"], 'training_log')
-    logs = sheet.get_all_records()
+def add_user_profiles(new_profiles):
+    append_dataset_rows("user_profiles", new_profiles)
+
+def get_freediver_user_name(full_name):
+    """Builds the "First L." user name from a full name, or returns None if it lacks a first or last name."""
+    parts = full_name.strip().split()
+    if len(parts) < 2:
+        return None
+    return f"{' '.join(parts[:-1])} {parts[-1][0].upper()}."
+
+def new_freediver_profile(user_name, certification, club, hashed_password=""):
+    """A fresh profile; without a hashed password the freediver logs in with DEFAULT_PASSWORD."""
+    return {
+        "user_name": user_name,
+        "id": uuid.uuid4().hex,
+        "certification": certification or "NB",
+        "certification_date": None,
+        "lifras_id": "",
+        "anonymize_results": False,
+        "consent_ai_feedback": False,
+        "motivations": "",
+        "projection_3_ans": "",
+        "portrait_photo_text": "",
+        "hashed_password": hashed_password,
+        "club": club,
+        "club_owner": False
+    }
+
+IMPORT_SEPARATORS = ("\t", ";", ",")
+
+def parse_freediver_import(text, existing_user_names, lang='fr'):
+    """
+    Parses a bulk import, one freediver per line: "First Last, certification, password".
+    Certification and password are optional; ';' and tabs are accepted as separators, detected line by line
+    so a first line holding only a name does not decide for the others.
+    Returns (entries, errors): entries are (user_name, certification, password) tuples,
+    errors are messages for the lines that cannot be imported.
+    """
+    lines = [line for line in text.splitlines() if line.strip()]
+    cert_levels = TRANSLATIONS[lang]["certification_levels"]
+
+    entries, errors, seen = [], [], set()
+    for line_number, line in enumerate(lines, start=1):
+        separator = max(IMPORT_SEPARATORS, key=line.count)
+        cells = next(csv.reader([line], delimiter=separator))
+        cells = [cell.strip() for cell in cells] + ["", ""]
+        full_name, certification, password = cells[0], cells[1].upper(), cells[2]
+        if line_number == 1 and full_name.lower() in ("nom", "name", "prénom et nom"):
+            continue
+
+        user_name = get_freediver_user_name(full_name)
+        if any(separator in full_name for separator in IMPORT_SEPARATORS):
+            error = _("bulk_import_name_separator_error", lang, full_name=full_name)
+        elif user_name is None:
+            error = _("freediver_name_empty_error", lang)
+        elif user_name in existing_user_names:
+            error = _("freediver_exists_error", lang, user_name=user_name)
+        elif user_name in seen:
+            error = _("bulk_import_duplicate_error", lang, user_name=user_name)
+        elif certification and certification not in cert_levels:
+            error = _("bulk_import_invalid_certification_error", lang, certification=certification)
+        elif len(password.encode('utf-8')) > 72:
+            error = _("bulk_import_password_too_long_error", lang)
+        else:
+            seen.add(user_name)
+            entries.append((user_name, certification or "NB", password))
+            continue
+        errors.append(_("bulk_import_line_error", lang, line=line_number, error=error))
+    return entries, errors
 
+# --- Data Handling for Training Logs ---
+def normalize_training_log(logs):
     updated = False
     for entry in logs:
-        if entry.get('id') is None:
+        if not entry.get('id'):
             entry['id'] = uuid.uuid4().hex
             updated = True
         if 'club' not in entry:
             entry['club'] = ''
             updated = True
+    return updated
 
-    if updated:
-        save_training_log(logs)
-    return logs
-
-def save_training_log(logs):
-    client = get_gsheets_client()
-    sheet = get_sheet_by_url(client, st.secrets["gsheets"]["training_log_sheet_url"], 'training_log')
-
-    if not logs:
-        sheet.clear()
-        sheet.update([["id", "date", "place", "description", "club"]])
-        return
-
-    all_keys = set()
-    for log in logs:
-        all_keys.update(log.keys())
-    
-    preferred_headers = ["id", "date", "place", "description", "club"]
-    final_headers = preferred_headers + [key for key in all_keys if key not in preferred_headers]
+def load_training_log():
+    return get_dataset("training_log", normalize=normalize_training_log)
 
-    data_to_write = [final_headers] + [[log.get(h) for h in final_headers] for log in logs]
+def save_training_log(logs, base_entry=None):
+    write_dataset("training_log", logs, base_entry)
 
-    sheet.clear()
-    sheet.update(data_to_write)
-    load_training_log.clear()
+def add_training_sessions(new_sessions):
+    queue_dataset_rows("training_log", new_sessions)
 
 # --- Data Handling for Instructor Feedback ---
-@st.cache_data(ttl=60, show_spinner="Chargement des feedbacks...")
-def load_instructor_feedback():
-    client = get_gsheets_client()
-    sheet = get_sheet_by_url(client, st.secrets["gsheets"]["instructor_feedback_sheet_url"], 'instructor_feedback')
-    feedback_data = sheet.get_all_records()
-
+def normalize_instructor_feedback(feedback_data):
     updated = False
     for entry in feedback_data:
-        if entry.get('id') is None:
+        if not entry.get('id'):
             entry['id'] = uuid.uuid4().hex
             updated = True
         if 'club' not in entry:
             entry['club'] = ''
             updated = True
+    return updated
 
-    if updated:
-        save_instructor_feedback(feedback_data)
-    return feedback_data
-
-def save_instructor_feedback(feedback_data):
-    client = get_gsheets_client()
-    sheet = get_sheet_by_url(client, st.secrets["gsheets"]["instructor_feedback_sheet_url"], 'instructor_feedback')
-
-    if not feedback_data:
-        sheet.clear()
-        sheet.update([["id", "feedback_date", "diver_name", "training_session_id", "instructor_name", "feedback_text", "club"]])
-        return
-
-    all_keys = set()
-    for fb in feedback_data:
-        all_keys.update(fb.keys())
-    
-    preferred_headers = ["id", "feedback_date", "diver_name", "training_session_id", "instructor_name", "feedback_text", "club"]
-    final_headers = preferred_headers + [key for key in all_keys if key not in preferred_headers]
+def load_instructor_feedback():
+    return get_dataset("instructor_feedback", normalize=normalize_instructor_feedback)
 
-    data_to_write = [final_headers] + [[fb.get(h) for h in final_headers] for fb in feedback_data]
+def save_instructor_feedback(feedback_data, base_entry=None):
+    write_dataset("instructor_feedback", feedback_data, base_entry)
 
-    sheet.clear()
-    sheet.update(data_to_write)
-    load_instructor_feedback.clear()
+def add_instructor_feedback(new_feedback):
+    queue_dataset_rows("instructor_feedback", new_feedback)
 
 # --- Data Handling for Freediver Wishes ---
-@st.cache_data(ttl=60, show_spinner="Chargement des souhaits...")
-def load_wishes():
-    client = get_gsheets_client()
-    sheet = get_sheet_by_url(client, st.secrets["gsheets"]["freediver_wishes_sheet_url"], 'FreediverWishes')
-    wishes_data = sheet.get_all_records()
-    
+def normalize_wishes(wishes_data):
     updated = False
     for entry in wishes_data:
-        if entry.get('id') is None:
+        if not entry.get('id'):
             entry['id'] = uuid.uuid4().hex
             updated = True
         if 'club' not in entry:
             entry['club'] = ''
             updated = True
-            
-    if updated:
-        save_wishes(wishes_data)
-    return wishes_data
+    return updated
 
-def save_wishes(wishes_data):
-    client = get_gsheets_client()
-    sheet = get_sheet_by_url(client, st.secrets["gsheets"]["freediver_wishes_sheet_url"], 'FreediverWishes')
-
-    if not wishes_data:
-        sheet.clear()
-        sheet.update([["id", "user_name", "date", "description", "club"]])
-        return
-
-    all_keys = set()
-    for wish in wishes_data:
-        all_keys.update(wish.keys())
-    
-    preferred_headers = ["id", "user_name", "date", "description", "club"]
-    final_headers = preferred_headers + [key for key in all_keys if key not in preferred_headers]
+def load_wishes():
+    return get_dataset("wishes", normalize=normalize_wishes)
 
-    data_to_write = [final_headers] + [[wish.get(h) for h in final_headers] for wish in wishes_data]
+def save_wishes(wishes_data, base_entry=None):
+    write_dataset("wishes", wishes_data, base_entry)
 
-    sheet.clear()
-    sheet.update(data_to_write)
-    load_wishes.clear()
+def add_wishes(new_wishes):
+    queue_dataset_rows("wishes", new_wishes)
 
 # --- Data Handling for Club Profiles ---
-@st.cache_data(ttl=3600*24, show_spinner="Chargement des profils de clubs...")
-def load_club_profiles():
-    client = get_gsheets_client()
-    sheet = get_sheet_by_url(client, st.secrets["gsheets"]["club_profiles_sheet_url"], 'ClubProfiles')
-    club_data = sheet.get_all_records()
-    
-    clubs = {c['club_name']: c for c in club_data if 'club_name' in c}
-    
+def normalize_club_profiles(club_data):
     updated = False
-    for club_name, club_profile in clubs.items():
-        if club_profile.get('id') is None:
+    for club_profile in club_data:
+        if 'club_name' in club_profile and not club_profile.get('id'):
             club_profile['id'] = uuid.uuid4().hex
             updated = True
-            
-    if updated:
-        save_club_profiles(clubs)
-    return clubs
+    return updated
 
-def save_club_profiles(club_profiles):
-    client = get_gsheets_client()
-    sheet = get_sheet_by_url(client, st.secrets["gsheets"]["club_profiles_sheet_url"], 'ClubProfiles')
+def load_club_profiles():
+    return get_dataset_view(
+        "club_profiles", "by_name", lambda rows: {c['club_name']: c for c in rows if 'club_name' in c},
+        normalize=normalize_club_profiles
+    )
+
+def save_club_profiles(club_profiles, base_entry=None):
+    write_dataset("club_profiles", list(club_profiles.values()), base_entry)
+
+def add_club_profiles(new_clubs):
+    append_dataset_rows("club_profiles", new_clubs)
+
+# --- Schema Migrations ---
+# Bump SCHEMA_VERSION whenever a normalize_* function starts back-filling something new:
+# every dataset is then migrated once, at the next startup or by running `python streamlit_app.py migrate`.
+SCHEMA_VERSION = 1
+
+# In dependency order: records are cleaned up against the migrated training log.
+SCHEMA_MIGRATIONS = {
+    "training_log": (normalize_training_log, save_training_log),
+    "records": (normalize_records, save_records),
+    "user_profiles": (normalize_user_profiles, lambda rows: save_user_profiles({p['user_name']: p for p in rows if 'user_name' in p})),
+    "instructor_feedback": (normalize_instructor_feedback, save_instructor_feedback),
+    "wishes": (normalize_wishes, save_wishes),
+    "club_profiles": (normalize_club_profiles, lambda rows: save_club_profiles({c['club_name']: c for c in rows if 'club_name' in c})),
+}
 
-    club_list = list(club_profiles.values())
-    if not club_list:
-        sheet.clear()
-        sheet.update([["id", "club_name"]])
-        return
+def get_schema_version(name):
+    get_dataset_versions()
+    return get_version_state()["schema_versions"].get(name, 0)
+
+def record_schema_version(name):
+    """Records in the versions worksheet that `name` is migrated to SCHEMA_VERSION."""
+    state = get_version_state()
+    state["checked_at"] = 0.0
+    get_dataset_versions()
+    row_number = state["rows"].get(name)
+
+    def record(sheet):
+        if row_number:
+            sheet.batch_update([
+                {"range": "A1:D1", "values": [VERSIONS_HEADERS]},
+                {"range": f"D{row_number}", "values": [[SCHEMA_VERSION]]},
+            ])
+        else:
+            sheet.append_row([name, "", "", SCHEMA_VERSION])
 
-    expected_headers = ["id", "club_name"]
-    
-    all_keys = set(expected_headers)
-    for club_data in club_list:
-        all_keys.update(club_data.keys())
-    
-    final_headers = list(expected_headers) + sorted([k for k in all_keys if k not in expected_headers])
-    
-    data_to_write = [final_headers]
-    for club_data in club_list:
-        row = []
-        for header in final_headers:
-            row.append(club_data.get(header, ""))
-        data_to_write.append(row)
+    run_on_sheet(get_versions_sheet_url(), VERSIONS_WORKSHEET, record, quota="write", idempotent=bool(row_number))
+    state["schema_versions"][name] = SCHEMA_VERSION
+    if not row_number:
+        state["checked_at"] = 0.0
 
-    sheet.clear()
-    sheet.update(data_to_write)
-    load_club_profiles.clear()
+def migrate_dataset(name):
+    """
+    Re-reads a dataset, back-fills it with its normalize function and writes back the rows that changed,
+    then records the schema version. Returns True when rows were written.
+    The save runs after the dataset lock is released: it flushes the write queue, whose lock the flusher
+    takes before the dataset lock, and merges with any write that landed since the read.
+    """
+    normalize, save = SCHEMA_MIGRATIONS[name]
+    with get_fetch_state()["locks"][name]:
+        version = get_published_version(name)
+        headers, cells, rows = read_dataset(name)
+        store_dataset(name, headers, cells, rows, normalized=False, version=version)
+    updated = normalize(rows)
+    if updated:
+        save(rows)
+    record_schema_version(name)
+    return updated
 
-# --- Data Handling for Login Logs ---
-def log_login_event(username):
-    client = get_gsheets_client()
-    sheet = get_sheet_by_url(client, st.secrets["gsheets"]["login_log_sheet_url"], 'LoginLogs')
-    
-    timestamp = datetime.now().isoformat()
-    new_log_entry = [username, timestamp]
+def migrate_datasets():
+    """
+    Migrates every dataset whose recorded schema version is behind SCHEMA_VERSION.
+    Returns {dataset: True/False when migrated with/without writes, or the exception that stopped it}.
+    Returns None, migrating nothing, when the versions worksheet cannot be read, as the result could not be recorded.
+    """
+    if get_dataset_versions() is None:
+        return None
+    results = {}
+    for name in SCHEMA_MIGRATIONS:
+        if get_schema_version(name) >= SCHEMA_VERSION:
+            continue
+        try:
+            results[name] = migrate_dataset(name)
+        except Exception as e:
+            results[name] = e
+    return results
+
+@st.cache_resource
+def get_migration_state():
+    return {"lock": threading.Lock(), "results": None}
+
+def run_startup_migrations():
+    """
+    Runs the pending schema migrations once per process, before the first datasets are loaded.
+    When the versions worksheet could not be read, nothing is marked done and a later rerun tries again.
+    """
+    state = get_migration_state()
+    with state["lock"]:
+        if state["results"] is None:
+            with st.spinner("Mise à jour du format des données..."):
+                state["results"] = migrate_datasets()
+        return state["results"]
+
+# --- Indexed Data Store ---
+# Marks a view in which no club is visible (a regular user without a club).
+NO_VISIBLE_CLUB = object()
+NO_SESSION_DETAILS = (None, _("no_specific_session_option"))
+MISSING_SESSION_DETAILS = (None, "Session Not Found")
+
+def group_rows(rows, key):
+    groups = {}
+    for row in rows:
+        groups.setdefault(key(row), []).append(row)
+    return groups
+
+def parse_iso_dates(values):
+    """
+    Datetime series of ISO dates and datetimes, NaT where a value is empty or not ISO.
+    Each distinct value is parsed once; sheets only hold a few hundred distinct dates.
+    """
+    parsed = {}
+    for value in values:
+        if value not in parsed:
+            try:
+                parsed[value] = pd.Timestamp(datetime.fromisoformat(str(value)).replace(tzinfo=None))
+            except ValueError:
+                parsed[value] = pd.NaT
+    return pd.to_datetime(pd.Series([parsed[value] for value in values], dtype=object))
+
+class DataStore:
+    """
+    Read-only indexes over the shared snapshots of one revision of every dataset,
+    so page renders cost O(result) instead of full scans.
+    Lookups return the indexed rows themselves: callers must not mutate them.
+    `club=None` means every club; any other value restricts results to the members of that club.
+    `snapshots` are the cache entries the rows come from: saves computed from these rows pass them as `base_entry`.
+    """
+    def __init__(self, training_log, records, user_profiles, instructor_feedback, wishes, club_profiles, snapshots=None):
+        self.snapshots = snapshots or {}
+        self.training_log = training_log
+        self.records = records
+        self.user_profiles = user_profiles
+        self.instructor_feedback = instructor_feedback
+        self.wishes = wishes
+        self.club_profiles = club_profiles
+
+        self.sessions_by_id = {log['id']: log for log in training_log if log.get('id')}
+        # (event_date, event_name) of each session, as shown next to records and feedback
+        self.session_details = {
+            session_id: (log.get('date'), f"{log.get('place','Session')}"[:100])
+            for session_id, log in self.sessions_by_id.items()
+        }
+        self.records_by_id = {r['id']: r for r in records if r.get('id')}
+        self.records_by_user = group_rows(records, lambda r: r.get('user'))
+        self.records_by_discipline = group_rows(records, lambda r: r.get('discipline'))
+        self.records_by_user_discipline = group_rows(records, lambda r: (r.get('user'), r.get('discipline')))
+        self.feedback_by_diver = group_rows(instructor_feedback, lambda fb: fb.get('diver_name'))
+
+        self.records_by_club = group_rows(records, lambda r: self.club_of(r.get('user')))
+        self.records_by_club_discipline = group_rows(records, lambda r: (self.club_of(r.get('user')), r.get('discipline')))
+        self.training_log_by_club = group_rows(training_log, lambda t: t.get('club', ''))
+        self.feedback_by_club = group_rows(instructor_feedback, lambda fb: self.club_of(fb.get('diver_name')))
+        self.wishes_by_club = group_rows(wishes, lambda w: self.club_of(w.get('user_name')))
+        self.user_profiles_by_club = {}
+        for name, profile in user_profiles.items():
+            self.user_profiles_by_club.setdefault(profile.get('club', ''), {})[name] = profile
+
+        # Options of the super admin club filter: every club, then '' (no club) if some freedivers have none
+        self.club_names = sorted(club_profiles, key=lambda x: (x == '', x))
+        if '' in self.user_profiles_by_club or None in self.user_profiles_by_club:
+            self.club_names = sorted(set(self.club_names) | {''}, key=lambda x: (x == '', x))
+
+        # What the club filter shows, per club. The None partition is every club ("Tous les Clubs").
+        partition_clubs = {None, NO_VISIBLE_CLUB, *club_profiles, *self.user_profiles_by_club, *self.training_log_by_club}
+        self.club_partitions = {club: self.build_club_partition(club) for club in partition_clubs}
+
+        self.records_frame = None
+        self.records_frame_index = None
+
+    def club_of(self, user_name):
+        return self.user_profiles.get(user_name, {}).get('club', '')
+
+    def is_visible(self, user_name, club):
+        return club is None or self.club_of(user_name) == club
+
+    def get_records(self, user=None, discipline=None, club=None):
+        if user is not None:
+            if not self.is_visible(user, club):
+                return []
+            if discipline is not None:
+                return self.records_by_user_discipline.get((user, discipline), [])
+            return self.records_by_user.get(user, [])
+        if discipline is not None:
+            if club is not None:
+                return self.records_by_club_discipline.get((club, discipline), [])
+            return self.records_by_discipline.get(discipline, [])
+        if club is not None:
+            return self.records_by_club.get(club, [])
+        return self.records
+
+    def get_session_details(self, session_id):
+        if not session_id:
+            return NO_SESSION_DETAILS
+        return self.session_details.get(session_id, MISSING_SESSION_DETAILS)
+
+    def get_training_log(self, club=None):
+        return self.training_log if club is None else self.training_log_by_club.get(club, [])
+
+    def get_feedback(self, diver=None, club=None):
+        if diver is not None:
+            return self.feedback_by_diver.get(diver, []) if self.is_visible(diver, club) else []
+        return self.instructor_feedback if club is None else self.feedback_by_club.get(club, [])
+
+    def get_wishes(self, club=None):
+        return self.wishes if club is None else self.wishes_by_club.get(club, [])
+
+    def get_user_profiles(self, club=None):
+        return self.user_profiles if club is None else self.user_profiles_by_club.get(club, {})
+
+    def build_club_partition(self, club):
+        return {
+            "records": self.get_records(club=club),
+            "training_log": self.get_training_log(club=club),
+            "instructor_feedback": self.get_feedback(club=club),
+            "wishes": self.get_wishes(club=club),
+            "user_profiles": self.get_user_profiles(club=club),
+        }
 
-    if not sheet.get_all_values():
-        sheet.append_row(["Username", "Login_Time"])
-    
-    sheet.append_row(new_log_entry)
+    def get_club_partition(self, club=None):
+        partition = self.club_partitions.get(club)
+        return partition if partition is not None else self.build_club_partition(club)
+
+    def build_records_frame(self):
+        """
+        Typed columnar copy of the records, in snapshot order: categorical user, discipline and club,
+        numeric parsed_value (NaN when unparsed), datetime entry_date and event_date (the linked session's date),
+        plus the session's name and "date - name" label. Sheet cells come back as a mix of ints, floats and strings:
+        they are converted here once instead of in every renderer.
+        """
+        records = self.records
+        session_details = [self.get_session_details(r.get('linked_training_session_id')) for r in records]
+        return pd.DataFrame({
+            "id": pd.Series([r.get('id') for r in records], dtype=object),
+            "user": pd.Categorical([r.get('user') for r in records]),
+            "discipline": pd.Categorical([r.get('discipline') for r in records]),
+            "club": pd.Categorical([self.club_of(r.get('user')) for r in records]),
+            "parsed_value": pd.to_numeric(pd.Series([r.get('parsed_value') for r in records], dtype=object), errors='coerce').astype(float),
+            "original_performance_str": pd.Series([to_cell_text(r.get('original_performance_str')) for r in records], dtype=object),
+            "comment": pd.Series([r.get('comment', '') for r in records], dtype=object),
+            "linked_training_session_id": pd.Series([r.get('linked_training_session_id') or None for r in records], dtype=object),
+            "entry_date": parse_iso_dates([r.get('entry_date') for r in records]),
+            "event_date": parse_iso_dates([details[0] for details in session_details]),
+            "event_name": pd.Series([details[1] for details in session_details], dtype=object),
+            "session_label": pd.Series([f"{details[0]} - {details[1]}" for details in session_details], dtype=object),
+        })
 
-# --- Authentication Config Handling ---
-@st.cache_data(ttl=300, show_spinner="Authentification...")
-def get_auth_config():
+    def build_records_frame_index(self, frame):
+        """Row positions of the records frame per user, club and discipline, and per user or club and discipline."""
+        return {
+            by: frame.groupby(list(by) if isinstance(by, tuple) else by, observed=True).indices
+            for by in ("user", "club", "discipline", ("user", "discipline"), ("club", "discipline"))
+        }
+
+    def get_records_frame(self, user=None, discipline=None, club=None):
+        """
+        Rows of the typed records frame (built on first use) matching the same filters as get_records,
+        in snapshot order. Filtered lookups take the rows' positions from the frame index.
+        """
+        if self.records_frame is None:
+            frame = self.build_records_frame()
+            self.records_frame_index = self.build_records_frame_index(frame)
+            self.records_frame = frame
+        frame = self.records_frame
+        if user is not None:
+            if not self.is_visible(user, club):
+                return frame.iloc[0:0]
+            by, key = "user", user
+        elif club is not None:
+            by, key = "club", club
+        else:
+            by, key = None, None
+        if discipline is not None:
+            by, key = ((by, "discipline"), (key, discipline)) if by else ("discipline", discipline)
+        if by is None:
+            return frame
+        return frame.iloc[self.records_frame_index[by].get(key, [])]
+
+@st.cache_resource
+def get_data_store_cache():
+    return {"revisions": None, "store": None}
+
+def get_data_store():
+    """
+    Returns the DataStore of the current dataset snapshots, indexing them only when one of them changed.
+    Rows are loaded after the snapshot entries were taken, and kept only if those entries are still current:
+    a snapshot swapped in between makes the rows load again, and a store that kept straddling two revisions
+    is returned without being cached. Its snapshots are then the entries taken before its rows loaded,
+    so saves from it still merge, against a base no newer than their rows.
+    """
+    dataset_cache = get_dataset_cache()
+    data_store_cache = get_data_store_cache()
+    for _attempt in range(DATA_STORE_LOAD_ATTEMPTS):
+        entries = {name: dataset_cache[name] for name in DATASETS}
+        revisions = tuple(entry["revision"] for entry in entries.values())
+        if data_store_cache["revisions"] == revisions:
+            return data_store_cache["store"]
+        rows = (
+            load_training_log(), load_records(), load_user_profiles(),
+            load_instructor_feedback(), load_wishes(), load_club_profiles()
+        )
+        if all(dataset_cache[name] is entry for name, entry in entries.items()):
+            store = DataStore(*rows, snapshots=entries)
+            data_store_cache["store"], data_store_cache["revisions"] = store, revisions
+            return store
+    return DataStore(*rows, snapshots=entries)
+
+# --- Personal Best Table ---
+class PersonalBests:
+    """
+    Materialized personal bests: the best record per (user, discipline), per (club, discipline) and per discipline
+    (club None), and the rankings of the users' bests. Lower is better for LOWER_IS_BETTER_DISCIPLINES;
+    ties go to the earliest record, like min/max over the snapshot did.
+    Built in one stable sort of a typed frame of the parsed records, then kept current by the write paths
+    through `apply_changes`, which only revisits the groups of the records written.
+    Lookups return the winning records themselves: callers must not mutate them.
+    `club=None` means every club, as in DataStore.
+    """
+    def __init__(self, records, user_profiles):
+        self.lock = threading.RLock()
+        self.clubs = get_user_clubs(user_profiles)
+        self.records_by_id = {}  # keyed by the id as the sheet displays it, like deletions are reported
+        self.members = {}  # group -> {record id: record}, in snapshot order
+        self.bests = {}  # group -> best record
+        self.rankings = {}  # (club, discipline) -> {user: best record}
+        self.sorted_rankings = {}
+
+        scored = [(record, self.get_score(record)) for record in records if record.get('id')]
+        frame = pd.DataFrame({
+            "user": pd.Series([record.get('user') for record, score in scored], dtype=object),
+            "club": pd.Series([self.clubs.get(record.get('user'), '') for record, score in scored], dtype=object),
+            "discipline": pd.Categorical([record.get('discipline') for record, score in scored]),
+            "score": pd.Series([score for record, score in scored], dtype=float),
+        })
+        frame = frame.dropna(subset=["user", "discipline", "score"])
+        frame = frame.sort_values("score", ascending=False, kind="stable")
+        for position, user, discipline in frame.drop_duplicates(["user", "discipline"])[["user", "discipline"]].itertuples():
+            self.set_best(("user", user, discipline), scored[position][0])
+        for position, club, discipline in frame.drop_duplicates(["club", "discipline"])[["club", "discipline"]].itertuples():
+            if club is not None:
+                self.set_best(("club", club, discipline), scored[position][0])
+        for position, discipline in frame.drop_duplicates(["discipline"])[["discipline"]].itertuples():
+            self.set_best(("club", None, discipline), scored[position][0])
+
+        for record, score in scored:
+            if score is not None and self.get_groups(record):
+                record_id = to_cell_text(record['id'])
+                self.records_by_id[record_id] = record
+                for group in self.get_groups(record):
+                    self.members.setdefault(group, {})[record_id] = record
+
+    @staticmethod
+    def get_score(record):
+        """The record's value, negated where lower is better so that the best score is always the highest; None if unparsed."""
+        try:
+            value = float(record.get('parsed_value'))
+        except (TypeError, ValueError):
+            return None
+        if pd.isna(value):
+            return None
+        return -value if is_lower_better(record.get('discipline')) else value
+
+    def get_groups(self, record):
+        """The (user, discipline), (club, discipline) and (all clubs, discipline) groups a record competes in."""
+        user, discipline = record.get('user'), record.get('discipline')
+        if user is None or discipline is None:
+            return []
+        groups = [("user", user, discipline), ("club", None, discipline)]
+        club = self.clubs.get(user, '')
+        if club is not None:
+            groups.append(("club", club, discipline))
+        return groups
+
+    def set_best(self, group, record):
+        if record is None:
+            self.bests.pop(group, None)
+        else:
+            self.bests[group] = record
+        kind, user, discipline = group
+        if kind != "user":
+            return
+        club = self.clubs.get(user, '')
+        for ranking_key in [(None, discipline)] + ([(club, discipline)] if club is not None else []):
+            ranking = self.rankings.setdefault(ranking_key, {})
+            if record is None:
+                ranking.pop(user, None)
+            else:
+                ranking[user] = record
+            self.sorted_rankings.pop(ranking_key, None)
+
+    def recompute(self, group):
+        """Finds the best of a group again among its members: O(size of the group)."""
+        best, best_score = None, None
+        for record in self.members.get(group, {}).values():
+            score = self.get_score(record)
+            if best is None or score > best_score:
+                best, best_score = record, score
+        self.set_best(group, best)
+
+    def insert(self, record):
+        score = self.get_score(record)
+        record_id = to_cell_text(record['id'])
+        self.records_by_id[record_id] = record
+        for group in self.get_groups(record):
+            self.members.setdefault(group, {})[record_id] = record
+            best = self.bests.get(group)
+            if best is None or score > self.get_score(best):
+                self.set_best(group, record)
+
+    def remove(self, record_id):
+        record = self.records_by_id.pop(record_id, None)
+        if record is None:
+            return
+        for group in self.get_groups(record):
+            self.members.get(group, {}).pop(record_id, None)
+            if self.bests.get(group) is record:
+                self.recompute(group)
+
+    def upsert(self, record):
+        record_id = to_cell_text(record.get('id'))
+        if not record_id:
+            return
+        old = self.records_by_id.get(record_id)
+        score = self.get_score(record)
+        groups = self.get_groups(record) if score is not None else []
+        if old is None or self.get_groups(old) != groups:
+            self.remove(record_id)
+            if groups:
+                self.insert(record)
+            return
+        # Same groups: replace in place, so the record keeps its rank among equals
+        self.records_by_id[record_id] = record
+        for group in groups:
+            self.members[group][record_id] = record
+            best = self.bests.get(group)
+            if best is old or score >= self.get_score(best):
+                self.recompute(group)
+
+    def apply_changes(self, upserted=(), deleted_ids=()):
+        with self.lock:
+            for record_id in deleted_ids:
+                self.remove(record_id)
+            for record in upserted:
+                self.upsert(record)
+
+    def get_user_best(self, user, discipline, club=None):
+        if club is not None and self.clubs.get(user, '') != club:
+            return None
+        return self.bests.get(("user", user, discipline))
+
+    def get_club_best(self, discipline, club=None):
+        return self.bests.get(("club", club, discipline))
+
+    def get_ranking(self, discipline, club=None):
+        """Every visible user's best in `discipline`, best first and by user name among equals."""
+        ranking_key = (club, discipline)
+        with self.lock:
+            ranking = self.sorted_rankings.get(ranking_key)
+            if ranking is None:
+                ranking = sorted(self.rankings.get(ranking_key, {}).values(), key=lambda r: (-self.get_score(r), r['user']))
+                self.sorted_rankings[ranking_key] = ranking
+            return ranking
+
+def get_user_clubs(user_profiles):
+    return {name: profile.get('club', '') for name, profile in user_profiles.items()}
+
+@st.cache_resource
+def get_personal_best_state():
+    """The process-wide PB table and the (records, user_profiles) snapshot revisions it reflects."""
+    return {"lock": threading.Lock(), "table": None, "revisions": None}
+
+def get_personal_bests():
     """
-    Loads authenticator config. Since user profiles are now in GSheets,
-    this function will generate credentials based on GSheets data.
+    The PB table of the current snapshots. Local writes keep it current (see update_personal_bests);
+    it is only rebuilt in full to repair a change it did not see: first use, a re-read of the records sheet,
+    a write that rewrote the whole sheet, or freedivers changing club.
     """
-    profiles = load_user_profiles()
-    all_users = sorted(list(profiles.keys()))
+    state = get_personal_best_state()
+    dataset_cache = get_dataset_cache()
+    revisions = tuple(dataset_cache[name]["revision"] if name in dataset_cache else None for name in ("records", "user_profiles"))
+    with state["lock"]:
+        table, table_revisions = state["table"], state["revisions"]
+    if table is not None and table_revisions == revisions:
+        return table
+    if table is not None and table_revisions[0] == revisions[0] and table.clubs == get_user_clubs(load_user_profiles()):
+        # Profile edits that moved nobody to another club leave every best where it was
+        with state["lock"]:
+            if state["table"] is table and state["revisions"] == table_revisions:
+                state["revisions"] = revisions
+        return table
+
+    # Rows are loaded after their revisions were read: a write landing in between only makes the next call rebuild again
+    table = PersonalBests(load_records(), load_user_profiles())
+    if None not in revisions:
+        with state["lock"]:
+            state["table"], state["revisions"] = table, revisions
+    return table
+
+def update_personal_bests(base_entry, entry, upserted=(), deleted_ids=()):
+    """
+    Applies a local write of the records dataset to the PB table, moving it from the `base_entry` snapshot to `entry`.
+    A table that does not reflect `base_entry` is left alone: it is rebuilt from the snapshots when next read.
+    """
+    state = get_personal_best_state()
+    with state["lock"]:
+        table = state["table"]
+        if table is None or base_entry is None or state["revisions"][0] != base_entry["revision"]:
+            return
+        table.apply_changes(upserted, deleted_ids)
+        state["revisions"] = (entry["revision"], state["revisions"][1])
 
-    credentials = {'usernames': {}}
+# --- Data Handling for Login Logs ---
+# Logins are buffered and appended in batches to one worksheet per month (LoginLogs-YYYY-MM), so the log stays bounded.
+LOGIN_LOG_HEADERS = ["Username", "Login_Time"]
+LOGIN_LOG_FLUSH_SECONDS = 15
+
+@st.cache_resource
+def get_login_event_sink():
+    """Login events waiting to be appended, and the monthly worksheets already known to exist with their header."""
+    return {"events": [], "ready_worksheets": set(), "lock": threading.Lock()}
+
+def get_login_log_worksheet_name(timestamp):
+    return f"LoginLogs-{timestamp[:7]}"
+
+def open_login_log_worksheet(url, worksheet_name):
+    """Creates the monthly worksheet with its header if needed; checked once per process and month."""
+    sink = get_login_event_sink()
+    if worksheet_name in sink["ready_worksheets"]:
+        return
+    try:
+        header = run_on_sheet(url, worksheet_name, lambda sheet: sheet.row_values(1))
+        if not header:
+            run_on_sheet(url, worksheet_name, lambda sheet: sheet.update([LOGIN_LOG_HEADERS]), quota="write")
+    except gspread.exceptions.WorksheetNotFound:
+        def create(spreadsheet):
+            sheet = spreadsheet.add_worksheet(worksheet_name, rows=1000, cols=len(LOGIN_LOG_HEADERS))
+            sheet.update([LOGIN_LOG_HEADERS])
+        run_on_spreadsheet(url, create, quota="write", idempotent=False)
+    sink["ready_worksheets"].add(worksheet_name)
+
+def flush_login_events():
+    """Appends the buffered login events with one append per monthly worksheet. Events that fail stay buffered."""
+    sink = get_login_event_sink()
+    with sink["lock"]:
+        events, sink["events"] = sink["events"], []
+    if not events:
+        return
+    url = st.secrets["gsheets"]["login_log_sheet_url"]
+    events_by_worksheet = {}
+    for event in events:
+        events_by_worksheet.setdefault(get_login_log_worksheet_name(event[1]), []).append(event)
+    for worksheet_name, worksheet_events in events_by_worksheet.items():
+        try:
+            open_login_log_worksheet(url, worksheet_name)
+            run_on_sheet(url, worksheet_name, lambda sheet: sheet.append_rows(worksheet_events, value_input_option="RAW"), quota="write", idempotent=False)
+        except Exception:
+            with sink["lock"]:
+                sink["events"] = worksheet_events + sink["events"]
+
+@st.cache_resource
+def start_login_event_flusher():
+    def flush_loop():
+        set_background_priority(True)
+        while True:
+            clock.sleep(LOGIN_LOG_FLUSH_SECONDS)
+            try:
+                flush_login_events()
+            except Exception:
+                pass
+
+    thread = threading.Thread(target=flush_loop, daemon=True)
+    thread.start()
+    return thread
 
-    for user_name in all_users:
-        user_profile = profiles.get(user_name, {})
-        stored_password_hash = user_profile.get("hashed_password")
+def log_login_event(username):
+    sink = get_login_event_sink()
+    with sink["lock"]:
+        sink["events"].append([username, datetime.now().isoformat()])
+    start_login_event_flusher()
 
-        if not stored_password_hash:
-            st.warning(f"No hashed password found for {user_name}. Using default 'changeme'. Please set a secure password via admin panel.")
-            stored_password_hash = bcrypt.hashpw("changeme".encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+# --- Authentication Config Handling ---
+# Users without a hashed password log in with this one until an admin sets theirs.
+DEFAULT_PASSWORD = "changeme"
 
-        username_key = ''.join(filter(str.isalnum, user_name)).lower()
-        credentials['usernames'][username_key] = {
-            "email": f"{username_key}@example.com",
-            "name": user_name,
-            "password": stored_password_hash
+def get_auth_config():
+    """
+    Authentication settings. Credentials are not part of it: they are looked up per username at login.
+    The cookie key is the `auth.cookie_key` secret; without it no session cookie is issued or accepted.
+    """
+    return {
+        'cookie': {
+            'name': 'freediving_cookie',
+            'key': st.secrets.get("auth", {}).get("cookie_key"),
+            'expiry_days': 30
         }
-
-    config = {
-        'credentials': credentials,
-        'cookie': {'name': 'freediving_cookie', 'key': 'a_secret_key', 'expiry_days': 30}
     }
 
-    return config
+def get_username_key(user_name):
+    return ''.join(filter(str.isalnum, user_name)).lower()
+
+def get_user_credentials(username):
+    """
+    Returns {"name", "password"} for a login username, or None if nobody uses it.
+    `password` is the stored bcrypt hash, or None for users who still have the default password.
+    Read from the current user_profiles snapshot, so only the profile of the user logging in is touched,
+    and saving other profile fields invalidates nothing.
+    """
+    usernames = get_dataset_view(
+        "user_profiles", "by_username_key",
+        lambda rows: {get_username_key(p['user_name']): p['user_name'] for p in rows if p.get('user_name')},
+        normalize=normalize_user_profiles
+    )
+    user_name = usernames.get(username.lower())
+    if user_name is None:
+        return None
+    return {"name": user_name, "password": load_user_profiles().get(user_name, {}).get("hashed_password") or None}
 
 def verify_password(plain_password, hashed_password):
-    """Verifies a plain password against a hashed one."""
+    """Verifies a plain password against a hashed one, or against DEFAULT_PASSWORD when there is no hash."""
+    if not hashed_password:
+        return hmac.compare_digest(plain_password.encode('utf-8'), DEFAULT_PASSWORD.encode('utf-8'))
     plain_password_bytes = plain_password.encode('utf-8')
     hashed_password_bytes = hashed_password.encode('utf-8')
     return bcrypt.checkpw(plain_password_bytes, hashed_password_bytes)
 
+PASSWORD_HASH_WORKERS = os.cpu_count() or 1
+
+def hash_passwords(passwords):
+    """
+    bcrypt-hashes plain passwords, in a process pool when there are several.
+    The pool uses spawn rather than fork: a forked child would inherit the locks
+    of the app's background threads in whatever state they happen to be.
+    """
+    encoded = [password.encode('utf-8') for password in passwords]
+    salts = [bcrypt.gensalt() for password in encoded]
+    if len(encoded) <= 1:
+        hashed = list(map(bcrypt.hashpw, encoded, salts))
+    else:
+        workers = min(len(encoded), PASSWORD_HASH_WORKERS)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            hashed = list(pool.map(bcrypt.hashpw, encoded, salts))
+    return [h.decode('utf-8') for h in hashed]
+
+# --- Session Tokens ---
+# A signed, expiring token stored in the auth cookie lets a returning browser resume its session
+# without the login form, bcrypt or a login event. Tokens embed a fingerprint of the password hash,
+# so changing a password revokes every token issued before.
+def sign_session_payload(payload, config):
+    return hmac.new(config['cookie']['key'].encode('utf-8'), payload.encode('utf-8'), hashlib.sha256).hexdigest()
+
+def get_password_fingerprint(hashed_password, config):
+    return sign_session_payload(f"password:{hashed_password or ''}", config)[:16]
+
+def create_session_token(user_name, hashed_password, config):
+    """Returns a signed session token for `user_name`, or None when no cookie key is configured."""
+    if not config['cookie']['key']:
+        return None
+    claims = {
+        "name": user_name,
+        "exp": int(clock.time() + config['cookie']['expiry_days'] * 24 * 3600),
+        "pwd": get_password_fingerprint(hashed_password, config),
+    }
+    payload = base64.urlsafe_b64encode(json.dumps(claims).encode('utf-8')).decode('ascii')
+    return f"{payload}.{sign_session_payload(payload, config)}"
+
+def read_session_token(token, config):
+    """
+    Returns the user name a token was issued to, or None if it is forged, malformed, expired or revoked,
+    or if no cookie key is configured.
+    """
+    if not config['cookie']['key']:
+        return None
+    payload, _separator, signature = (token or "").rpartition(".")
+    if not payload or not hmac.compare_digest(signature.encode('utf-8'), sign_session_payload(payload, config).encode('ascii')):
+        return None
+    try:
+        claims = json.loads(base64.urlsafe_b64decode(payload.encode('ascii')))
+        user_name, expires_at, fingerprint = str(claims["name"]), float(claims["exp"]), str(claims["pwd"])
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return None
+    if expires_at < clock.time():
+        return None
+    profile = load_user_profiles().get(user_name)
+    if profile is None or not hmac.compare_digest(fingerprint.encode('utf-8'), get_password_fingerprint(profile.get("hashed_password"), config).encode('ascii')):
+        return None
+    return user_name
+
+def resume_session_from_cookie(config):
+    """Authenticates a new browser session from its auth cookie, once per session."""
+    if st.session_state.get('session_cookie_checked'):
+        return
+    st.session_state['session_cookie_checked'] = True
+    user_name = read_session_token(st.context.cookies.get(config['cookie']['name']), config)
+    if user_name:
+        st.session_state['authentication_status'] = True
+        st.session_state['name'] = user_name
+
+def sync_session_cookie(config):
+    """Writes or deletes the auth cookie requested by the previous run (login or logout), in a run that is not cut short by st.rerun."""
+    token = st.session_state.pop('session_token_to_store', None)
+    clear = st.session_state.pop('session_token_to_clear', False)
+    if not token and not clear:
+        return
+    cookie_manager = stx.CookieManager(key="session_cookie_manager")
+    if token:
+        cookie_manager.set(
+            config['cookie']['name'], token,
+            expires_at=datetime.fromtimestamp(clock.time() + config['cookie']['expiry_days'] * 24 * 3600)
+        )
+    else:
+        try:
+            cookie_manager.delete(config['cookie']['name'])
+        except KeyError:
+            pass  # The browser cookies were not read back yet; the delete request itself was sent
+
 # --- Performance Parsing and Formatting ---
 def is_time_based_discipline(discipline_key):
     return discipline_key in ["Static Apnea (STA)", "16x25m Speed Endurance"]
@@ -817,17 +2358,9 @@ def parse_distance_to_meters(dist_str, lang='fr'):
     except (ValueError, TypeError): st.error(_("invalid_distance_format", lang, dist_str=dist_str)); return None
 
 # --- Helper to get session details ---
-def get_training_session_details(session_id, training_logs):
-    """Fetches training session details by ID."""
-    if not session_id:
-        return {"event_date": None, "event_name": _("no_specific_session_option")}
-    for log in training_logs:
-        if log.get('id') == session_id:
-            return {
-                "event_date": log.get('date'),
-                "event_name": f"{log.get('place','Session')}"[:100]
-            }
-    return {"event_date": None, "event_name": "Session Not Found"}
+def get_training_session_details(session_id, data_store):
+    """Returns the (event_date, event_name) of a training session, precomputed once per data revision."""
+    return data_store.get_session_details(session_id)
 
 def style_feedback_text(text):
     """
@@ -869,55 +2402,70 @@ def display_login_form(config, lang):
         username = st.text_input("Nom d'utilisateur")
         password = st.text_input("Mot de passe", type="password")
         if st.button("Se connecter"):
-            user_data = config['credentials']['usernames'].get(username.lower())
+            user_data = get_user_credentials(username)
             if user_data and verify_password(password, user_data['password']):
                 st.session_state['authentication_status'] = True
                 st.session_state['name'] = user_data['name']
+                st.session_state['session_token_to_store'] = create_session_token(user_data['name'], user_data['password'], config)
                 log_login_event(user_data['name'])
                 st.rerun()
             else:
                 st.error(_("login_error", lang))
 
 
-def display_level_performance_tab(all_records, user_profiles, discipline_keys, lang):
+@st.cache_resource
+def get_level_stats_cache():
+    return {"revisions": None, "stats": {}}
+
+def get_level_stats(club, discipline_keys):
     """
-    Displays the aggregated performances by certification level, with a unique color for each level.
-    `user_profiles` parameter should now be the already filtered profiles.
+    Distribution of the freedivers' bests per discipline and certification level, for `club` (None for all clubs):
+    count, mean, std, min, quartiles and max, from one grouped describe() over the PB table's rankings,
+    so every best is taken in the discipline's own direction.
+    Cached per club until the records or the profiles change.
     """
-    if not all_records:
-        st.info(_("no_ranking_data", lang))
-        return
-
-    records_df = pd.DataFrame(all_records)
-
-    profiles_list = []
-    for user, profile_data in user_profiles.items():
-        profiles_list.append({
-            'user': user,
-            'certification': profile_data.get('certification', _("no_certification_option", lang))
-        })
-    profiles_df = pd.DataFrame(profiles_list)
-
-    if profiles_df.empty:
-        st.info(_("no_stats_data", lang))
-        return
-
-    merged_df = pd.merge(records_df, profiles_df, on='user', how='left')
-    merged_df['certification'].fillna(_("no_certification_option", lang), inplace=True)
-
-    merged_df = merged_df.dropna(subset=['parsed_value'])
+    dataset_cache = get_dataset_cache()
+    revisions = (dataset_cache["records"]["revision"], dataset_cache["user_profiles"]["revision"])
+    level_stats_cache = get_level_stats_cache()
+    if level_stats_cache["revisions"] != revisions:
+        level_stats_cache.update(revisions=revisions, stats={})
+    stats_by_club = level_stats_cache["stats"]
+    if club in stats_by_club:
+        return stats_by_club[club]
+
+    personal_bests = get_personal_bests()
+    user_profiles = load_user_profiles()
+    no_certification = _("no_certification_option")
+    bests = [
+        (discipline, user_profiles.get(record['user'], {}).get('certification') or no_certification, float(record['parsed_value']))
+        for discipline in discipline_keys
+        for record in personal_bests.get_ranking(discipline, club=club)
+    ]
+    frame = pd.DataFrame(bests, columns=["discipline", "certification", "parsed_value"])
+    if frame.empty:
+        stats = pd.DataFrame(columns=["discipline", "certification", "count", "mean", "std", "min", "q1", "median", "q3", "max"])
+    else:
+        cert_order = CERT_ORDER + [no_certification]
+        frame["certification"] = pd.Categorical(
+            frame["certification"], categories=cert_order + sorted(set(frame["certification"]) - set(cert_order)), ordered=True
+        )
+        stats = frame.groupby(["discipline", "certification"], observed=True)["parsed_value"].describe().reset_index()
+        stats = stats.rename(columns={"25%": "q1", "50%": "median", "75%": "q3"})
+        stats["certification"] = stats["certification"].astype(str)
+    stats_by_club[club] = stats
+    return stats
 
-    if merged_df.empty:
-        st.info(_("no_stats_data", lang))
+def display_level_performance_tab(club, discipline_keys, lang):
+    """
+    Displays the distribution of the freedivers' best performances by certification level for `club`
+    (None for all clubs): quartile box, min-max whiskers, median tick and mean, with a unique color for each level.
+    """
+    level_stats = get_level_stats(club, discipline_keys)
+    if level_stats.empty:
+        st.info(_("no_ranking_data", lang))
         return
 
-    idx = merged_df.groupby(['user', 'discipline'])['parsed_value'].idxmax()
-    if discipline_keys and is_lower_better(discipline_keys[0]):
-        idx = merged_df.groupby(['user', 'discipline'])['parsed_value'].idxmin()
-
-    best_perf_df = merged_df.loc[idx]
-
-    cert_order = ["NB", "A1", "A2", "A3", "S4", "I1", "I2", "I3", _("no_certification_option", lang)]
+    cert_order = CERT_ORDER + [_("no_certification_option", lang)]
     cert_colors = [
         "#D074B9",
         "#67C27F",
@@ -935,54 +2483,64 @@ def display_level_performance_tab(all_records, user_profiles, discipline_keys, l
 
     for i, disc_key in enumerate(discipline_keys):
         with sub_tabs[i]:
-            discipline_df = best_perf_df[best_perf_df['discipline'] == disc_key]
+            discipline_stats = level_stats[level_stats['discipline'] == disc_key].copy()
 
-            if discipline_df.empty:
+            if discipline_stats.empty:
                 st.info(_("no_stats_data", lang))
                 continue
 
-            agg_df = discipline_df.groupby('certification')['parsed_value'].mean().reset_index()
-            agg_df['certification'] = pd.Categorical(agg_df['certification'], categories=cert_order, ordered=True)
-            agg_df = agg_df.sort_values('certification')
-
             if is_time_based_discipline(disc_key):
-                y_axis_title = f"{_('avg_performance_col', lang)} ({_('seconds_unit', lang)})"
-                agg_df['formatted_perf'] = agg_df['parsed_value'].apply(format_seconds_to_static_time)
+                x_axis_title = f"Performance ({_('seconds_unit', lang)})"
+                format_perf = format_seconds_to_static_time
             else:
-                y_axis_title = f"{_('avg_performance_col', lang)} ({_('meters_unit', lang)})"
-                agg_df['formatted_perf'] = agg_df['parsed_value'].apply(lambda x: f"{int(x)}m")
-
-            chart = alt.Chart(agg_df).mark_bar().encode(
+                x_axis_title = f"Performance ({_('meters_unit', lang)})"
+                format_perf = lambda x: f"{int(x)}m"
+            for column in ["mean", "median", "q1", "q3", "min", "max"]:
+                discipline_stats[f"{column}_formatted"] = discipline_stats[column].map(format_perf)
+            discipline_stats["quartiles_formatted"] = discipline_stats["q1_formatted"] + " - " + discipline_stats["q3_formatted"]
+            discipline_stats["range_formatted"] = discipline_stats["min_formatted"] + " - " + discipline_stats["max_formatted"]
+            discipline_stats["count"] = discipline_stats["count"].astype(int)
+            discipline_stats["label"] = discipline_stats["mean_formatted"] + " (" + discipline_stats["count"].astype(str) + ")"
+
+            base = alt.Chart(discipline_stats).encode(
                 y=alt.Y('certification:N', title=_("certification_level_col", lang), sort=cert_order),
-                x=alt.X('parsed_value:Q', title=y_axis_title, scale=alt.Scale(zero=False)),
                 color=alt.Color('certification:N',
                                  scale=alt.Scale(domain=cert_order, range=cert_colors),
                                  legend=None
                                 ),
                 tooltip=[
                     alt.Tooltip('certification', title=_("certification_level_col", lang)),
-                    alt.Tooltip('formatted_perf', title=_("avg_performance_col", lang))
+                    alt.Tooltip('count', title=_("freedivers_count_col", lang)),
+                    alt.Tooltip('mean_formatted', title=_("avg_performance_col", lang)),
+                    alt.Tooltip('median_formatted', title=_("median_performance_col", lang)),
+                    alt.Tooltip('quartiles_formatted', title=_("quartiles_performance_col", lang)),
+                    alt.Tooltip('range_formatted', title=_("range_performance_col", lang))
                 ]
-            ).properties(
-                width=alt.Step(40),
-                height=450,
-                title=f"{_('avg_performance_by_certification_header', lang)} - {_('disciplines.' + disc_key, lang)}"
-
             )
-
-            text = chart.mark_text(
-                align='center',
-                baseline='bottom',
-                dy=0,
-                dx=20,
+            whiskers = base.mark_rule().encode(
+                x=alt.X('min:Q', title=x_axis_title, scale=alt.Scale(zero=False)),
+                x2='max:Q'
+            )
+            boxes = base.mark_bar(size=24).encode(x='q1:Q', x2='q3:Q')
+            medians = base.mark_tick(color='black', size=24, thickness=2).encode(x='median:Q')
+            means = base.mark_point(shape='diamond', filled=True, color='black', size=60).encode(x='mean:Q')
+            text = base.mark_text(
+                align='left',
+                baseline='middle',
+                dx=8,
                 color='black',
                 fontSize=14,
                 fontWeight='bold'
             ).encode(
-                text='formatted_perf:N'
+                x='max:Q',
+                text='label:N'
             )
 
-            st.altair_chart(chart + text, use_container_width=True)
+            chart = (whiskers + boxes + medians + means + text).properties(
+                height=450,
+                title=f"{_('performance_distribution_by_certification_header', lang)} - {_('disciplines.' + disc_key, lang)}"
+            )
+            st.altair_chart(chart, use_container_width=True)
 
 def display_feedbacks_by_apneist_chart(instructor_feedback_data, user_profiles, lang):
     """
@@ -1073,12 +2631,10 @@ def main_app():
     
     
     # Load all raw data at the very beginning
-    training_log_all = load_training_log()
-    all_records_all = load_records(training_log_all)
-    user_profiles_all = load_user_profiles()
-    instructor_feedback_all = load_instructor_feedback()
-    all_wishes_all = load_wishes()
-    club_profiles_all = load_club_profiles()
+    load_all_datasets()
+    data_store = get_data_store()
+    training_log_all, all_records_all, user_profiles_all = data_store.training_log, data_store.records, data_store.user_profiles
+    instructor_feedback_all, all_wishes_all, club_profiles_all = data_store.instructor_feedback, data_store.wishes, data_store.club_profiles
 
     current_user = st.session_state.get("name")
     is_admin_view_authorized = current_user in PRIVILEGED_USERS
@@ -1105,49 +2661,51 @@ def main_app():
 
     # --- Determine filtered dataframes based on selected_club_filter ---
     if is_super_admin_view_authorized and st.session_state.selected_club_filter == _("all_clubs_option", lang):
-        filtered_records = all_records_all
-        filtered_training_log = training_log_all
-        filtered_instructor_feedback = instructor_feedback_all
-        filtered_wishes = all_wishes_all
-        filtered_user_profiles = user_profiles_all
+        visible_club = None
+    # If a non-super-privileged user has no club, they see nothing from filtered views
+    elif not current_user_club and not is_super_admin_view_authorized:
+        visible_club = NO_VISIBLE_CLUB
     else:
-        target_club = st.session_state.selected_club_filter
-        
-        # If a non-super-privileged user has no club, they see nothing from filtered views
-        if not current_user_club and not is_super_admin_view_authorized:
-            filtered_records = []
-            filtered_training_log = []
-            filtered_instructor_feedback = []
-            filtered_wishes = []
-            filtered_user_profiles = {}
-        else:
-            # Filtering logic for a specific club or current user's club
-            filtered_records = [r for r in all_records_all if user_profiles_all.get(r['user'], {}).get('club', '') == target_club]
-            filtered_training_log = [t for t in training_log_all if t.get('club', '') == target_club]
-            filtered_instructor_feedback = [fb for fb in instructor_feedback_all if user_profiles_all.get(fb['diver_name'], {}).get('club', '') == target_club]
-            filtered_wishes = [w for w in all_wishes_all if user_profiles_all.get(w['user_name'], {}).get('club', '') == target_club]
-            filtered_user_profiles = {name: profile for name, profile in user_profiles_all.items() if profile.get('club', '') == target_club}
+        # Filtering logic for a specific club or current user's club
+        visible_club = st.session_state.selected_club_filter
+
+    club_partition = data_store.get_club_partition(visible_club)
+    filtered_records = club_partition["records"]
+    filtered_training_log = club_partition["training_log"]
+    filtered_instructor_feedback = club_partition["instructor_feedback"]
+    filtered_wishes = club_partition["wishes"]
+    filtered_user_profiles = club_partition["user_profiles"]
 
 
     with st.sidebar:
+        pending_writes, failed_writes = get_write_queue_status(current_user)
+        if failed_writes:
+            st.warning(f"{failed_writes} enregistrement(s) pas encore envoyé(s) vers Google Sheets suite à une erreur. Nouvel essai automatique en cours.")
+        elif pending_writes:
+            st.caption(f"{pending_writes} enregistrement(s) en cours d'envoi vers Google Sheets...")
+        if get_version_state()["unpublished"]:
+            st.warning("Des modifications enregistrées ne sont pas encore signalées aux autres sessions de l'app. Nouvel essai automatique en cours.")
         st.info(f"Suis tes **performances** et **activités** et complète ton **profil** pour générer un **feedback personnalisé** intégrant les retours de tes encadrants 👀.")
 
         # --- Club Filter for SUPER_PRIVILEGED_USERS only ---
         if is_super_admin_view_authorized:
-            all_club_names = sorted(list(club_profiles_all.keys()))
-            if any(profile.get('club') == '' or profile.get('club') is None for profile in user_profiles_all.values()):
-                all_club_names.insert(0, '')
-                all_club_names = sorted(set(all_club_names), key=lambda x: (x == '', x))
-            
+            club_filter_options = [_("all_clubs_option", lang)] + data_store.club_names
+
             selected_club_for_admin_filter = st.selectbox(
                 _("filter_by_club_label", lang),
-                options=[_("all_clubs_option", lang)] + all_club_names,
+                options=club_filter_options,
                 format_func=lambda x: x if x != '' else 'Pas de Club',
-                index=([_("all_clubs_option", lang)] + all_club_names).index(st.session_state.selected_club_filter) if st.session_state.selected_club_filter in ([_("all_clubs_option", lang)] + all_club_names) else 0,
+                index=club_filter_options.index(st.session_state.selected_club_filter) if st.session_state.selected_club_filter in club_filter_options else 0,
                 key="admin_club_filter_sidebar",
                 on_change=lambda: st.session_state.update(selected_club_filter=st.session_state.admin_club_filter_sidebar)
             )
             st.session_state.selected_club_filter = selected_club_for_admin_filter
+            sheet_reads, coalesced_reads = get_fetch_stats()
+            quota_headroom = get_quota_headroom()
+            st.caption(
+                f"Lectures Google Sheets : {sheet_reads} · mutualisées : {coalesced_reads} · "
+                f"quota disponible : lecture {quota_headroom['read']:.0%}, écriture {quota_headroom['write']:.0%}"
+            )
         else:
             club_display_name = current_user_club if current_user_club else "Non défini"
             # st.success(f"Club : **{club_display_name}**")
@@ -1238,7 +2796,7 @@ def main_app():
                 )
 
                 if st.form_submit_button(_("save_profile_button", lang)):
-                    profiles_to_save = load_user_profiles() # Reload to ensure we have the latest data before modification
+                    profiles_to_save = dict(user_profiles_all)
                     user_profile = profiles_to_save.get(current_user, {}).copy()
 
                     cert_selection = st.session_state.certification_select_profile_form_sb
@@ -1255,7 +2813,7 @@ def main_app():
 
                     profiles_to_save[current_user] = user_profile
 
-                    save_user_profiles(profiles_to_save)
+                    save_user_profiles(profiles_to_save, data_store.snapshots.get("user_profiles"))
                     st.success(_("profile_saved_success", lang, user=current_user))
                     st.rerun()
 
@@ -1263,6 +2821,7 @@ def main_app():
         if st.button(_("logout_button", lang)):
             st.session_state['authentication_status'] = False
             st.session_state['name'] = None
+            st.session_state['session_token_to_clear'] = True
             if 'selected_club_filter' in st.session_state:
                 del st.session_state['selected_club_filter']
             if 'new_club_name_buffer' in st.session_state:
@@ -1307,8 +2866,7 @@ def main_app():
                         st.error(_("training_description_empty_error", lang))
                     else:
                         new_training_entry = {"id": uuid.uuid4().hex, "date": date_to_save.isoformat(), "place": place_to_save, "description": desc_to_save, "club": current_user_club}
-                        training_log_all.append(new_training_entry)
-                        save_training_log(training_log_all)
+                        add_training_sessions([new_training_entry])
                         st.success(_("training_session_saved_success", lang))
                         st.session_state.clear_training_form = True
                         st.rerun()
@@ -1357,8 +2915,7 @@ def main_app():
                                 "comment": current_log_perf_comment,
                                 "club": current_user_club
                             }
-                            all_records_all.append(new_record)
-                            save_records(all_records_all)
+                            add_records([new_record])
                             st.success(_("performance_saved_success", lang, user=current_user))
                             st.session_state.clear_perf_form = True
                             st.rerun()
@@ -1413,8 +2970,7 @@ def main_app():
                             "training_session_id": sel_fb_training_id, "instructor_name": current_user, "feedback_text": sel_fb_text,
                             "club": current_user_club
                         }
-                        instructor_feedback_all.append(new_feedback)
-                        save_instructor_feedback(instructor_feedback_all)
+                        add_instructor_feedback([new_feedback])
                         st.success(_("feedback_saved_success", lang))
                         st.session_state.clear_feedback_form = True
                         st.rerun()
@@ -1434,8 +2990,7 @@ def main_app():
                         "description": desc_to_save,
                         "club": current_user_club
                     }
-                    all_wishes_all.append(new_wish)
-                    save_wishes(all_wishes_all)
+                    add_wishes([new_wish])
                     st.success(_("wish_saved_success", lang))
                     st.session_state.clear_wish_form = True
                     st.rerun()
@@ -1454,8 +3009,7 @@ def main_app():
                         st.error(_("club_name_exists_error", lang, club_name=name_to_save))
                     else:
                         new_club_entry = {"id": uuid.uuid4().hex, "club_name": name_to_save}
-                        club_profiles_all[name_to_save] = new_club_entry
-                        save_club_profiles(club_profiles_all)
+                        add_club_profiles([new_club_entry])
                         st.success(_("club_saved_success", lang, club_name=name_to_save))
                         st.session_state.clear_new_club_form = True
                         st.rerun()
@@ -1482,38 +3036,55 @@ def main_app():
                     if st.form_submit_button(_("save_new_freediver_button", lang)):
                         full_name_input = st.session_state.new_freediver_full_name_input
                         selected_new_freediver_cert = st.session_state.new_freediver_cert_select
-                        parts = full_name_input.strip().split()
-                        if len(parts) < 2:
+                        new_freediver_user_name = get_freediver_user_name(full_name_input)
+                        if new_freediver_user_name is None:
                             st.error(_("freediver_name_empty_error", lang))
+                        elif new_freediver_user_name in user_profiles_all:
+                            st.error(_("freediver_exists_error", lang, user_name=new_freediver_user_name))
                         else:
-                            first_name = " ".join(parts[:-1]).strip()
-                            last_name_initial = parts[-1][0].upper()
-                            
-                            new_freediver_user_name = f"{first_name} {last_name_initial}."
-                            
-                            if new_freediver_user_name in user_profiles_all:
-                                st.error(_("freediver_exists_error", lang, user_name=new_freediver_user_name))
-                            else:
-                                new_profile_data = {
-                                    "user_name": new_freediver_user_name,
-                                    "id": uuid.uuid4().hex,
-                                    "certification": "NB" if selected_new_freediver_cert == _("no_certification_option", lang) else selected_new_freediver_cert,
-                                    "certification_date": None,
-                                    "lifras_id": "",
-                                    "anonymize_results": False,
-                                    "consent_ai_feedback": False,
-                                    "motivations": "",
-                                    "projection_3_ans": "",
-                                    "portrait_photo_text": "",
-                                    "hashed_password": bcrypt.hashpw("changeme".encode('utf-8'), bcrypt.gensalt()).decode('utf-8'),
-                                    "club": current_user_club,
-                                    "club_owner": False
-                                }
-                                user_profiles_all[new_freediver_user_name] = new_profile_data
-                                save_user_profiles(user_profiles_all)
+                            new_profile_data = new_freediver_profile(
+                                new_freediver_user_name,
+                                None if selected_new_freediver_cert == _("no_certification_option", lang) else selected_new_freediver_cert,
+                                current_user_club
+                            )
+                            add_user_profiles([new_profile_data])
+
+                            st.success(_("new_freediver_success", lang, user_name=new_freediver_user_name, club_name=current_user_club))
+                            st.session_state.clear_new_freediver_form = True
+                            st.rerun()
 
-                                st.success(_("new_freediver_success", lang, user_name=new_freediver_user_name, club_name=current_user_club))
-                                st.session_state.clear_new_freediver_form = True
+                with st.expander(_("bulk_import_freedivers_header", lang)):
+                    st.caption(_("bulk_import_freedivers_help", lang))
+                    with st.form(key="bulk_freediver_import_form"):
+                        st.text_area(_("bulk_import_text_label", lang), key="bulk_freediver_import_text")
+                        uploaded_import_file = st.file_uploader(
+                            _("bulk_import_file_label", lang), type=["csv", "txt"],
+                            key=f"bulk_freediver_import_file_{st.session_state.bulk_freediver_import_file_nonce}"
+                        )
+
+                        if st.form_submit_button(_("bulk_import_button", lang)):
+                            if uploaded_import_file is not None:
+                                import_text = uploaded_import_file.getvalue().decode('utf-8-sig')
+                            else:
+                                import_text = st.session_state.bulk_freediver_import_text
+                            import_entries, import_errors = parse_freediver_import(import_text, user_profiles_all, lang)
+                            if import_errors:
+                                st.error("\n\n".join(import_errors))
+                            elif not import_entries:
+                                st.error(_("bulk_import_empty_error", lang))
+                            else:
+                                with st.spinner("Import des apnéistes..."):
+                                    passwords = [password for _name, _cert, password in import_entries if password]
+                                    hashed_passwords = iter(hash_passwords(passwords))
+                                    new_profiles = [
+                                        new_freediver_profile(user_name, certification, current_user_club,
+                                                              next(hashed_passwords) if password else "")
+                                        for user_name, certification, password in import_entries
+                                    ]
+                                    add_user_profiles(new_profiles)
+
+                                st.success(_("bulk_import_success", lang, count=len(new_profiles), club_name=current_user_club))
+                                st.session_state.clear_bulk_freediver_import = True
                                 st.rerun()
 
         st.caption('*Développé par Charles de Brier (2025)*')
@@ -1599,8 +3170,7 @@ def main_app():
                             hide_index=True, key="training_log_editor", num_rows="dynamic"
                         )
                         if st.form_submit_button(_("save_training_log_changes_button", lang)):
-                            all_logs_from_source = load_training_log()
-                            logs_map = {log['id']: log for log in all_logs_from_source}
+                            logs_map = {log['id']: log for log in training_log_all}
 
                             edited_rows = edited_training_df.to_dict('records')
 
@@ -1622,7 +3192,7 @@ def main_app():
                                 })
                                 logs_map[log_to_update['id']] = log_to_update
 
-                            save_training_log(list(logs_map.values()))
+                            save_training_log(list(logs_map.values()), data_store.snapshots.get("training_log"))
                             st.success(_("training_log_updated_success", lang))
                             st.rerun()
             elif selected_training_sub_tab_label == _("training_sessions_sub_tab_label", lang):
@@ -1738,7 +3308,7 @@ def main_app():
                                         "description": row[_("training_description_label", lang)],
                                         "club": st.session_state.selected_club_filter if st.session_state.selected_club_filter != _("all_clubs_option", lang) else current_user_club
                                     })
-                            save_training_log(logs_outside_filter + new_log_list)
+                            save_training_log(logs_outside_filter + new_log_list, data_store.snapshots.get("training_log"))
                             st.success(_("training_log_updated_success", lang))
                             st.rerun()
 
@@ -1773,21 +3343,21 @@ def main_app():
 
             discipline_keys = ["Dynamic Bi-fins (DYN-BF)", "Static Apnea (STA)", "Dynamic No-fins (DNF)", "Depth (CWT/FIM)", "Depth (VWT/NLT)", "16x25m Speed Endurance"]
             if selected_perf_sub_tab_label == _("personal_records_tab_label", lang):
-                user_records_for_tab = [r for r in filtered_records if r['user'] == current_user]
+                user_records_for_tab = data_store.get_records(user=current_user, club=visible_club)
                 if not user_records_for_tab:
                     st.info(_("no_performances_yet", lang))
                 else:
                     with st.container(border=False):
                         pbs_tab = {}
+                        personal_bests = get_personal_bests()
                         for disc_key_pb_tab in discipline_keys:
-                            disc_records_pb_tab = [r for r in user_records_for_tab if r['discipline'] == disc_key_pb_tab and r.get('parsed_value') is not None]
-                            if not disc_records_pb_tab:
+                            best_record_pb_tab = personal_bests.get_user_best(current_user, disc_key_pb_tab, club=visible_club)
+                            if best_record_pb_tab is None:
                                 pbs_tab[disc_key_pb_tab] = ("N/A", "N/A", "N/A")
                                 continue
-                            best_record_pb_tab = min(disc_records_pb_tab, key=lambda x: x['parsed_value']) if is_lower_better(disc_key_pb_tab) else max(disc_records_pb_tab, key=lambda x: x['parsed_value'])
                             pb_value_formatted_tab = format_seconds_to_static_time(best_record_pb_tab['parsed_value']) if is_time_based_discipline(disc_key_pb_tab) else f"{int(best_record_pb_tab['parsed_value'])}m"
-                            session_details = get_training_session_details(best_record_pb_tab.get('linked_training_session_id'), training_log_all)
-                            pbs_tab[disc_key_pb_tab] = (pb_value_formatted_tab, session_details['event_name'], session_details['event_date'])
+                            event_date, event_name = get_training_session_details(best_record_pb_tab.get('linked_training_session_id'), data_store)
+                            pbs_tab[disc_key_pb_tab] = (pb_value_formatted_tab, event_name, event_date)
 
                         # Define pastel colors for each discipline for a softer, more appealing look
                         discipline_colors = {
@@ -1825,19 +3395,16 @@ def main_app():
 
                         for i_sub_tab_user, disc_key_sub_tab_user in enumerate(discipline_keys):
                             with personal_sub_tabs_objects[i_sub_tab_user]:
-                                chart_data_list = [
-                                    {
-                                        "Date": pd.to_datetime(get_training_session_details(r_chart.get('linked_training_session_id'), training_log_all).get('event_date')),
-                                        "PerformanceValue": r_chart['parsed_value'],
-                                        "Lieu": get_training_session_details(r_chart.get('linked_training_session_id'), training_log_all).get('event_name'),
-                                        "Comment": r_chart.get("comment", "")
-                                    }
-                                    for r_chart in sorted(user_records_for_tab, key=lambda x: get_training_session_details(x.get('linked_training_session_id'), training_log_all).get('event_date') or '1900-01-01')
-                                    if r_chart['discipline'] == disc_key_sub_tab_user and r_chart.get('parsed_value') is not None and get_training_session_details(r_chart.get('linked_training_session_id'), training_log_all).get('event_date')
-                                ]
+                                history_frame = data_store.get_records_frame(user=current_user, discipline=disc_key_sub_tab_user, club=visible_club)
+                                chart_frame = history_frame.dropna(subset=["parsed_value", "event_date"]).sort_values("event_date", kind="stable")
                                 st.markdown(f"#### {_('performance_evolution_subheader', lang)}")
-                                if chart_data_list:
-                                    chart_df = pd.DataFrame(chart_data_list)
+                                if not chart_frame.empty:
+                                    chart_df = pd.DataFrame({
+                                        "Date": chart_frame["event_date"],
+                                        "PerformanceValue": chart_frame["parsed_value"],
+                                        "Lieu": chart_frame["event_name"],
+                                        "Comment": chart_frame["comment"]
+                                    })
                                     y_axis_title = _("performance_value_label", lang)
                                     tooltip_list = ['Date:T', 'Lieu:N', alt.Tooltip('Comment:N', title=_('history_comment_col', lang))]
                                     if is_time_based_discipline(disc_key_sub_tab_user):
@@ -1858,27 +3425,24 @@ def main_app():
                                 else:
                                     st.caption(_("no_data_for_graph", lang))
                                 st.markdown(f"#### {_('history_table_subheader', lang)}")
-                                history_for_editor_raw = [r for r in user_records_for_tab if r['discipline'] == disc_key_sub_tab_user]
-                                if not history_for_editor_raw:
+                                if history_frame.empty:
                                     st.caption(_("no_history_display", lang))
                                 else:
                                     training_session_options = {ts.get('id'): f"{ts.get('date')} - {ts.get('place', 'N/A')}" for ts in sorted(training_log_all, key=lambda x: x.get('date', '1900-01-01'), reverse=True)}
                                     training_session_options[None] = _("no_specific_session_option", lang)
 
                                     session_display_to_id = {v: k for k, v in training_session_options.items()}
-                                    history_for_editor_display = []
-                                    for rec in sorted(history_for_editor_raw, key=lambda x: get_training_session_details(x.get('linked_training_session_id'), training_log_all).get('event_date') or '1900-01-01', reverse=True):
-                                        perf_value = rec.get("original_performance_str", "")
-                                        if not is_time_based_discipline(disc_key_sub_tab_user):
-                                            perf_value = rec.get("parsed_value")
-                                        
-                                        history_for_editor_display.append({
-                                            "id": rec.get("id"),
-                                            _("link_training_session_label", lang): training_session_options.get(rec.get("linked_training_session_id"), _("no_specific_session_option", lang)),
-                                            _("history_performance_col", lang): perf_value,
-                                            _("history_comment_col", lang): rec.get("comment", ""),
-                                            _("history_delete_col_editor", lang): False
-                                        })
+                                    history_editor_frame = history_frame.sort_values("event_date", ascending=False, na_position="last", kind="stable")
+                                    history_for_editor_display = pd.DataFrame({
+                                        "id": history_editor_frame["id"],
+                                        _("link_training_session_label", lang): history_editor_frame["linked_training_session_id"].map(training_session_options).fillna(_("no_specific_session_option", lang)),
+                                        _("history_performance_col", lang): (
+                                            history_editor_frame["original_performance_str"] if is_time_based_discipline(disc_key_sub_tab_user)
+                                            else history_editor_frame["parsed_value"].round().astype("Int64")  # Whole meters: saved back as "50", not "50.0"
+                                        ),
+                                        _("history_comment_col", lang): history_editor_frame["comment"],
+                                        _("history_delete_col_editor", lang): False
+                                    }).reset_index(drop=True)
                                     with st.form(key=f"personal_history_form_{disc_key_sub_tab_user}", border=False):
                                         performance_column_config = {}
                                         if is_time_based_discipline(disc_key_sub_tab_user):
@@ -1890,7 +3454,7 @@ def main_app():
                                                 format="%d m"
                                             )
                                         edited_df = st.data_editor(
-                                            pd.DataFrame(history_for_editor_display),
+                                            history_for_editor_display,
                                             column_config={
                                                 "id": None,
                                                 _("link_training_session_label", lang): st.column_config.SelectboxColumn(options=list(training_session_options.values()), required=True),
@@ -1907,8 +3471,9 @@ def main_app():
                                                 if row[_("history_delete_col_editor", lang)]:
                                                     continue
 
-                                                original_rec = next((r for r in all_records_all if r['id'] == row['id']), None)
+                                                original_rec = data_store.records_by_id.get(row['id'])
                                                 if original_rec:
+                                                    original_rec = dict(original_rec)
                                                     new_perf_str = str(row[_("history_performance_col", lang)]).strip()
                                                     new_session_id = session_display_to_id.get(row[_("link_training_session_label", lang)])
                                                     parsed_val = parse_static_time_to_seconds(new_perf_str, lang) if is_time_based_discipline(disc_key_sub_tab_user) else parse_distance_to_meters(new_perf_str, lang)
@@ -1920,29 +3485,28 @@ def main_app():
                                                     else:
                                                         st.error(f"Invalid performance format for '{new_perf_str}'")
                                                     records_to_process.append(original_rec)
-                                            save_records(records_to_process)
+                                            save_records(records_to_process, data_store.snapshots.get("records"))
                                             st.success(_("history_updated_success", lang))
                                             st.rerun()
 
             elif selected_perf_sub_tab_label == _("club_level_performance_tab_title", lang):
-                display_level_performance_tab(filtered_records, filtered_user_profiles, discipline_keys, lang)
+                display_level_performance_tab(visible_club, discipline_keys, lang)
 
             elif is_super_admin_view_authorized and selected_perf_sub_tab_label == f"{_('club_performances_overview_tab_label', lang)}":
                 if not filtered_records:
                     st.info(_("no_ranking_data", lang))
                 else:
                     with st.container(border=False):
-                        all_known_users_list = sorted(list(set(r['user'] for r in filtered_records).union(set(filtered_user_profiles.keys()))))
+                        personal_bests = get_personal_bests()
                         club_pbs = {}
                         for disc_key_club_pb in discipline_keys:
-                            club_disc_records = [r for r in filtered_records if r['discipline'] == disc_key_club_pb and r.get('parsed_value') is not None]
-                            if not club_disc_records:
+                            best_club_record = personal_bests.get_club_best(disc_key_club_pb, club=visible_club)
+                            if best_club_record is None:
                                 club_pbs[disc_key_club_pb] = ("N/A", None, None, None)
                                 continue
-                            best_club_record = min(club_disc_records, key=lambda x: x['parsed_value']) if is_lower_better(disc_key_club_pb) else max(club_disc_records, key=lambda x: x['parsed_value'])
                             club_pb_value_formatted = format_seconds_to_static_time(best_club_record['parsed_value']) if is_time_based_discipline(disc_key_club_pb) else f"{int(best_club_record['parsed_value'])}m"
-                            session_details = get_training_session_details(best_club_record.get('linked_training_session_id'), training_log_all)
-                            club_pbs[disc_key_club_pb] = (club_pb_value_formatted, best_club_record['user'], session_details['event_name'], session_details['event_date'])
+                            event_date, event_name = get_training_session_details(best_club_record.get('linked_training_session_id'), data_store)
+                            club_pbs[disc_key_club_pb] = (club_pb_value_formatted, best_club_record['user'], event_name, event_date)
                         cols_club_pb = st.columns(len(discipline_keys))
                         for i, disc_key_club_pb_col in enumerate(discipline_keys):
                             val_club, user_club, event_name_club, event_date_club = club_pbs.get(disc_key_club_pb_col)
@@ -1980,17 +3544,13 @@ def main_app():
 
                     for i_rank_sub_tab, selected_discipline_ranking_key in enumerate(discipline_keys):
                         with ranking_sub_tabs_objects[i_rank_sub_tab]:
-                            user_pbs_for_discipline_ranking = []
-                            for u_rank_tab in all_known_users_list:
-                                user_specific_discipline_records_ranking = [r for r in filtered_records if r['user'] == u_rank_tab and r['discipline'] == selected_discipline_ranking_key and r.get('parsed_value') is not None]
-                                if user_specific_discipline_records_ranking:
-                                    best_record_for_user_ranking = min(user_specific_discipline_records_ranking, key=lambda x: x['parsed_value']) if is_lower_better(selected_discipline_ranking_key) else max(user_specific_discipline_records_ranking, key=lambda x: x['parsed_value'])
-                                    session_details = get_training_session_details(best_record_for_user_ranking.get('linked_training_session_id'), training_log_all)
-                                    user_pbs_for_discipline_ranking.append({
-                                        "user": u_rank_tab, "parsed_value": best_record_for_user_ranking['parsed_value'],
-                                        "event_date": session_details['event_date'], "event_name": session_details['event_name']
-                                    })
-                            sorted_rankings_tab = sorted(user_pbs_for_discipline_ranking, key=lambda x: x['parsed_value'], reverse=not is_lower_better(selected_discipline_ranking_key))
+                            sorted_rankings_tab = []
+                            for best_record_for_user_ranking in personal_bests.get_ranking(selected_discipline_ranking_key, club=visible_club):
+                                event_date, event_name = get_training_session_details(best_record_for_user_ranking.get('linked_training_session_id'), data_store)
+                                sorted_rankings_tab.append({
+                                    "user": best_record_for_user_ranking['user'], "parsed_value": best_record_for_user_ranking['parsed_value'],
+                                    "event_date": event_date, "event_name": event_name
+                                })
                             if not sorted_rankings_tab:
                                 st.info(_("no_ranking_data", lang))
                             else:
@@ -2022,23 +3582,24 @@ def main_app():
                         key="perf_log_discipline_filter_overview"
                     )
 
-                display_records = filtered_records
-                if filter_user_perf != _("all_freedivers_option", lang): display_records = [r for r in display_records if r['user'] == filter_user_perf]
-                if filter_session_id_perf != _("all_sessions_option", lang): display_records = [r for r in display_records if r.get('linked_training_session_id') == filter_session_id_perf]
-                if filter_discipline_perf != _("all_disciplines_option", lang): display_records = [r for r in display_records if r['discipline'] == filter_discipline_perf]
-
-                display_data = [
-                    {
-                        _("user_col", lang): rec["user"],
-                        _("history_discipline_col", lang): _(f"disciplines.{rec['discipline']}", lang),
-                        _("link_training_session_label", lang): f"{get_training_session_details(rec.get('linked_training_session_id'), training_log_all)['event_date']} - {get_training_session_details(rec.get('linked_training_session_id'), training_log_all)['event_name']}",
-                        _("history_performance_col", lang): rec["original_performance_str"],
-                        _("history_comment_col", lang): rec.get("comment", ""),
-                        _("history_entry_date_col", lang): rec["entry_date"]
-                    }
-                    for rec in sorted(display_records, key=lambda x: x.get('entry_date', '1900-01-01'), reverse=True)
-                ]
-                st.dataframe(pd.DataFrame(display_data), hide_index=True, use_container_width=True)
+                display_frame = data_store.get_records_frame(
+                    user=filter_user_perf if filter_user_perf != _("all_freedivers_option", lang) else None,
+                    discipline=filter_discipline_perf if filter_discipline_perf != _("all_disciplines_option", lang) else None,
+                    club=visible_club
+                )
+                if filter_session_id_perf is None: display_frame = display_frame[display_frame["linked_training_session_id"].isna()]
+                elif filter_session_id_perf != _("all_sessions_option", lang): display_frame = display_frame[display_frame["linked_training_session_id"] == filter_session_id_perf]
+                display_frame = display_frame.sort_values("entry_date", ascending=False, na_position="last", kind="stable")
+
+                display_df = pd.DataFrame({
+                    _("user_col", lang): display_frame["user"],
+                    _("history_discipline_col", lang): display_frame["discipline"].map(lambda key: _(f"disciplines.{key}", lang)),
+                    _("link_training_session_label", lang): display_frame["session_label"],
+                    _("history_performance_col", lang): display_frame["original_performance_str"],
+                    _("history_comment_col", lang): display_frame["comment"],
+                    _("history_entry_date_col", lang): display_frame["entry_date"].dt.date
+                })
+                st.dataframe(display_df, hide_index=True, use_container_width=True)
 
             elif is_admin_view_authorized and selected_perf_sub_tab_label == f"{_('edit_performances_sub_tab_label', lang)}":
                 if not filtered_records:
@@ -2047,25 +3608,24 @@ def main_app():
                     all_known_users_list_filtered = sorted(list(set(profile['user_name'] for profile in filtered_user_profiles.values())))
                     training_session_options = {log['id']: f"{log.get('date')} - {log.get('place', 'N/A')}" for log in filtered_training_log}
                     training_session_options[None] = _("no_specific_session_option", lang)
-                    perf_log_data = [
-                        {
-                            "id": rec["id"],
-                            _("user_col", lang): rec["user"],
-                            _("history_discipline_col", lang): _(f"disciplines.{rec['discipline']}", lang),
-                            _("link_training_session_label", lang): training_session_options.get(rec.get("linked_training_session_id")),
-                            _("history_performance_col", lang): rec["original_performance_str"],
-                            _("history_comment_col", lang): rec.get("comment", ""),
-                            _("history_delete_col_editor", lang): False
-                        }
-                        for rec in sorted(filtered_records, key=lambda x: x.get('entry_date', '1900-01-01'), reverse=True)
-                    ]
+                    perf_log_frame = data_store.get_records_frame(club=visible_club).sort_values("entry_date", ascending=False, na_position="last", kind="stable")
+                    # Plain object columns: the editor adds rows with values outside the categories
+                    perf_log_data = pd.DataFrame({
+                        "id": perf_log_frame["id"],
+                        _("user_col", lang): perf_log_frame["user"].astype(object),
+                        _("history_discipline_col", lang): perf_log_frame["discipline"].map(lambda key: _(f"disciplines.{key}", lang)).astype(object),
+                        _("link_training_session_label", lang): perf_log_frame["linked_training_session_id"].map(training_session_options).fillna(_("no_specific_session_option", lang)),
+                        _("history_performance_col", lang): perf_log_frame["original_performance_str"],
+                        _("history_comment_col", lang): perf_log_frame["comment"],
+                        _("history_delete_col_editor", lang): False
+                    }).reset_index(drop=True)
                     session_display_to_id = {v: k for k, v in training_session_options.items()}
                     discipline_labels = [_("disciplines."+k, lang) for k in discipline_keys]
                     discipline_label_to_key = {label: key for label, key in zip(discipline_labels, discipline_keys)}
 
                     with st.form(key="all_performances_edit_form", border=False):
                         edited_perf_log_df = st.data_editor(
-                            pd.DataFrame(perf_log_data),
+                            perf_log_data,
                             column_config={
                                 "id": None,
                                 _("user_col", lang): st.column_config.SelectboxColumn(options=all_known_users_list_filtered, required=True),
@@ -2078,8 +3638,7 @@ def main_app():
                             num_rows="dynamic", hide_index=True, key="all_perf_editor", use_container_width=True
                         )
                         if st.form_submit_button(_("save_all_performances_button", lang)):
-                            all_records_from_source = load_records(training_log_all)
-                            records_map = {r['id']: r for r in all_records_from_source}
+                            records_map = {r['id']: r for r in all_records_all}
 
                             edited_rows = edited_perf_log_df.to_dict('records')
 
@@ -2121,7 +3680,7 @@ def main_app():
                                     st.error(f"Erreur lors du traitement d'une ligne : {row}. Erreur : {e}")
                                     continue
 
-                            save_records(list(records_map.values()))
+                            save_records(list(records_map.values()), data_store.snapshots.get("records"))
                             st.success(_("all_performances_updated_success", lang))
                             st.rerun()
 
@@ -2149,7 +3708,7 @@ def main_app():
                 )
 
             if selected_feedback_sub_tab_label == my_feedback_sub_tab_label:
-                user_feedback = [fb for fb in filtered_instructor_feedback if fb.get('diver_name') == current_user]
+                user_feedback = data_store.get_feedback(diver=current_user, club=visible_club)
                 fresh_user_profiles = filtered_user_profiles
                 user_profile_data = fresh_user_profiles.get(current_user, {})
                 has_ai_consent = user_profile_data.get("consent_ai_feedback", False)
@@ -2241,8 +3800,7 @@ def main_app():
                 else:
                     table_data = []
                     for fb in self_feedbacks:
-                        session_details = get_training_session_details(fb.get("training_session_id"), training_log_all)
-                        event_date_str = session_details.get('event_date')
+                        event_date_str, event_name = get_training_session_details(fb.get("training_session_id"), data_store)
                         
                         sort_date = datetime.min
                         if event_date_str:
@@ -2252,7 +3810,7 @@ def main_app():
                                 pass
                             
                         table_data.append({
-                            _("self_feedback_event_col", lang): session_details.get('event_name', _("no_specific_session_option", lang)),
+                            _("self_feedback_event_col", lang): event_name,
                             _("self_feedback_date_col", lang): event_date_str if event_date_str else "N/A",
                             _("self_feedback_text_col", lang): fb.get('feedback_text', ''),
                             "sort_key": sort_date
@@ -2291,9 +3849,9 @@ def main_app():
                     st.info(_("no_feedbacks_match_filters", lang))
                 else:
                     for fb in sorted(display_feedbacks, key=lambda x: x.get('feedback_date', '1900-01-01'), reverse=True):
-                        session_details = get_training_session_details(fb.get("training_session_id"), training_log_all)
-                        display_date = session_details['event_date'] or _('no_specific_session_option', lang)
-                        st.markdown(f"**{fb['diver_name']} par {fb['instructor_name']} à {session_details['event_name']} le {display_date}**")
+                        event_date, event_name = get_training_session_details(fb.get("training_session_id"), data_store)
+                        display_date = event_date or _('no_specific_session_option', lang)
+                        st.markdown(f"**{fb['diver_name']} par {fb['instructor_name']} à {event_name} le {display_date}**")
                         with st.container(border=False):
                             style_feedback_text(fb['feedback_text'])
                         st.markdown("")
@@ -2345,8 +3903,7 @@ def main_app():
                         )
 
                         if st.form_submit_button(_("save_feedback_log_changes_button", lang)):
-                            all_feedbacks_from_source = load_instructor_feedback()
-                            feedback_map = {fb['id']: fb for fb in all_feedbacks_from_source}
+                            feedback_map = {fb['id']: fb for fb in instructor_feedback_all}
 
                             edited_rows = edited_feedback_df.to_dict('records')
 
@@ -2372,7 +3929,7 @@ def main_app():
                                 })
                                 feedback_map[feedback_to_update['id']] = feedback_to_update
 
-                            save_instructor_feedback(list(feedback_map.values()))
+                            save_instructor_feedback(list(feedback_map.values()), data_store.snapshots.get("instructor_feedback"))
                             st.success(_("feedback_log_updated_success", lang))
                             st.rerun()
 
@@ -2507,8 +4064,7 @@ def main_app():
                         )
 
                         if st.form_submit_button(_("save_wishes_changes_button", lang)):
-                            all_wishes_from_source = load_wishes()
-                            wishes_map = {w['id']: w for w in all_wishes_from_source}
+                            wishes_map = {w['id']: w for w in all_wishes_all}
 
                             edited_rows = edited_wishes_df.to_dict('records')
 
@@ -2532,7 +4088,7 @@ def main_app():
                                 })
                                 wishes_map[wish_to_update['id']] = wish_to_update
                             
-                            save_wishes(list(wishes_map.values()))
+                            save_wishes(list(wishes_map.values()), data_store.snapshots.get("wishes"))
                             st.success(_("wishes_updated_success", lang))
                             st.rerun()
 
@@ -2616,7 +4172,7 @@ def main_app():
                     if st.form_submit_button(_("save_freedivers_changes_button", lang)):
                         edited_rows = edited_freedivers_df.to_dict('records')
 
-                        final_profiles = load_user_profiles() # Reload to have a complete and fresh dataset
+                        final_profiles = dict(user_profiles_all)
 
                         # --- 1. Handle Deletions ---
                         original_names_in_editor = {d['original_name'] for d in freedivers_data_for_editor}
@@ -2635,6 +4191,7 @@ def main_app():
 
                         name_map = {}
                         profiles_to_process = final_profiles.copy()
+                        profiles_to_hash = []
 
                         for row in edited_rows:
                             original_name = row.get("original_name")
@@ -2657,30 +4214,35 @@ def main_app():
 
                             new_password_for_hash = row.get(_("set_reset_password_col_editor", lang))
                             if new_password_for_hash:
-                                profile_data["hashed_password"] = bcrypt.hashpw(new_password_for_hash.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+                                profiles_to_hash.append((profile_data, new_password_for_hash))
 
                             profiles_to_process[new_name] = profile_data
 
                             if original_name and original_name != new_name:
                                 name_map[original_name] = new_name
 
+                        hashed_passwords = hash_passwords([password for _profile, password in profiles_to_hash])
+                        for (profile_data, _password), hashed_password in zip(profiles_to_hash, hashed_passwords):
+                            profile_data["hashed_password"] = hashed_password
+
                         if name_map:
-                            for rec in all_records_all:
-                                rec["user"] = name_map.get(rec.get("user"), rec.get("user"))
-                            for fb in instructor_feedback_all:
-                                fb["diver_name"] = name_map.get(fb.get("diver_name"), fb.get("diver_name"))
-                                fb["instructor_name"] = name_map.get(fb.get("instructor_name"), fb.get("instructor_name"))
-                            for w in all_wishes_all:
-                                w["user_name"] = name_map.get(w.get("user_name"), w.get("user_name"))
+                            # Snapshots are shared with every session: rename on copies
+                            all_records_all = [dict(rec, user=name_map.get(rec.get("user"), rec.get("user"))) for rec in all_records_all]
+                            instructor_feedback_all = [
+                                dict(fb, diver_name=name_map.get(fb.get("diver_name"), fb.get("diver_name")),
+                                     instructor_name=name_map.get(fb.get("instructor_name"), fb.get("instructor_name")))
+                                for fb in instructor_feedback_all
+                            ]
+                            all_wishes_all = [dict(w, user_name=name_map.get(w.get("user_name"), w.get("user_name"))) for w in all_wishes_all]
 
                             if st.session_state.get("name") in name_map:
                                 st.session_state["name"] = name_map[st.session_state.get("name")]
                             
-                            save_records(all_records_all)
-                            save_instructor_feedback(instructor_feedback_all)
-                            save_wishes(all_wishes_all)
+                            save_records(all_records_all, data_store.snapshots.get("records"))
+                            save_instructor_feedback(instructor_feedback_all, data_store.snapshots.get("instructor_feedback"))
+                            save_wishes(all_wishes_all, data_store.snapshots.get("wishes"))
 
-                        save_user_profiles(profiles_to_process)
+                        save_user_profiles(profiles_to_process, data_store.snapshots.get("user_profiles"))
                         st.success(_("freedivers_updated_success", lang))
                         st.rerun()
 
@@ -2787,6 +4349,18 @@ def main():
         st.session_state.new_club_name_input = ""
         st.session_state.clear_new_club_form = False
 
+    if st.session_state.get('clear_new_freediver_form'):
+        st.session_state.new_freediver_full_name_input = ""
+        st.session_state.clear_new_freediver_form = False
+
+    # A file uploader cannot be emptied through session state: a new key gives a fresh, empty one
+    if 'bulk_freediver_import_file_nonce' not in st.session_state:
+        st.session_state.bulk_freediver_import_file_nonce = 0
+    if st.session_state.get('clear_bulk_freediver_import'):
+        st.session_state.bulk_freediver_import_text = ""
+        st.session_state.bulk_freediver_import_file_nonce += 1
+        st.session_state.clear_bulk_freediver_import = False
+
     # Initialize session state for forms
     if 'training_date_form_key' not in st.session_state:
         st.session_state.training_date_form_key = date.today()
@@ -2870,6 +4444,9 @@ def main():
         """, unsafe_allow_html=True)
 
     config = get_auth_config()
+    if not st.session_state['authentication_status']:
+        resume_session_from_cookie(config)
+    sync_session_cookie(config)
 
     if st.session_state['authentication_status']:
         main_app()
@@ -2878,4 +4455,18 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if sys.argv[1:] == ["migrate"]:
+        # Schema migration job: `python streamlit_app.py migrate`
+        migration_results = migrate_datasets()
+        if migration_results is None:
+            print("Versions worksheet unreadable: nothing migrated.")
+            sys.exit(1)
+        if not migration_results:
+            print(f"Nothing to migrate (schema version {SCHEMA_VERSION}).")
+        for dataset_name, result in migration_results.items():
+            if isinstance(result, Exception):
+                print(f"{dataset_name}: failed: {result}")
+            else:
+                print(f"{dataset_name}: migrated to schema version {SCHEMA_VERSION}{' (rows written)' if result else ''}")
+    else:
+        main()
\ No newline at end of file